@@ -0,0 +1,162 @@
+"""Password hashing and account checks.
+
+Each call here costs a full bcrypt run, so the GUI only reaches it through
+db_async worker threads. bcrypt releases the GIL while hashing, so those
+threads hash in parallel; HASH_CONCURRENCY caps how many do at once so a
+burst of logins can't take every core with it. The database connection is
+only held for the lookup or insert, never while hashing.
+"""
+import hashlib
+import os
+import secrets
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+import bcrypt
+from database import (
+    create_user, get_user_credentials, get_user_login, update_user_password,
+    create_session, get_session_user, delete_session
+)
+
+# Cost of new hashes (2**rounds iterations). Stored hashes keep the cost they
+# were made with; a successful login at another cost is rehashed to this one.
+BCRYPT_ROUNDS = int(os.environ.get("SAKU_BCRYPT_ROUNDS", "12"))
+HASH_CONCURRENCY = os.cpu_count() or 2
+
+# "Remember me": where this machine keeps its session token, and how long
+# a session lasts before the password is asked for again.
+SESSION_PATH = os.environ.get("SAKU_SESSION_PATH", os.path.join(os.path.expanduser("~"), ".sakudo_session"))
+SESSION_DAYS = 30
+
+_hash_slots = threading.BoundedSemaphore(HASH_CONCURRENCY)
+_rehash_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="rehash")
+_dummy_hash = None
+
+
+def hash_password(password, rounds=None):
+    with _hash_slots:
+        salt = bcrypt.gensalt(rounds or BCRYPT_ROUNDS)
+        return bcrypt.hashpw(password.encode('utf-8'), salt).decode('utf-8')
+
+
+def check_password(password, password_hash):
+    with _hash_slots:
+        return bcrypt.checkpw(password.encode('utf-8'), password_hash.encode('utf-8'))
+
+
+def hash_rounds(password_hash):
+    # "$2b$12$<salt><hash>"
+    try:
+        return int(password_hash.split("$")[2])
+    except (IndexError, ValueError):
+        return None
+
+
+def add_user(username, password):
+    """Create an account; returns its user_id, or None if the name is taken or the database is down."""
+    return create_user(username, hash_password(password))
+
+
+def verify_user(username, password):
+    """user_id if password is right for username, else None."""
+    return _check_credentials(get_user_credentials(username), password)
+
+
+def login(username, password):
+    """(user_id, first page of tasks) if password is right for username, else None.
+
+    verify_user() plus the task list's opening page, read in the same
+    round-trip as the password hash so the window can fill in at once.
+    """
+    found = get_user_login(username)
+    user_id = _check_credentials(found[:2] if found else None, password)
+    return (user_id, found[2]) if user_id else None
+
+
+def _check_credentials(credentials, password):
+    if credentials is None:
+        # Spend the same time as a real check so the response time doesn't
+        # tell which usernames exist.
+        check_password(password, _get_dummy_hash())
+        return None
+
+    user_id, password_hash = credentials
+    if not check_password(password, password_hash):
+        return None
+    if hash_rounds(password_hash) != BCRYPT_ROUNDS:
+        # The login answer doesn't wait for the new hash.
+        _rehash_pool.submit(_rehash, user_id, password)
+    return user_id
+
+
+def _rehash(user_id, password):
+    try:
+        update_user_password(user_id, hash_password(password))
+    except Exception as e:
+        print(f"Error rehashing password: {e}")
+
+
+def _utc(delta=timedelta()):
+    return (datetime.now(timezone.utc) + delta).strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _token_hash(token):
+    # Tokens are 256 random bits, so a plain SHA-256 is enough; bcrypt would
+    # put its cost right back on the launch it is meant to skip.
+    return hashlib.sha256(token.encode('utf-8')).hexdigest()
+
+
+def remember_user(user_id):
+    """Start a session for user_id and keep its token on this machine."""
+    previous = load_session_token()
+    if previous is not None:
+        # The file holds one token; don't leave the one it replaces valid.
+        delete_session(_token_hash(previous))
+    token = secrets.token_urlsafe(32)
+    if not create_session(_token_hash(token), user_id, _utc(timedelta(days=SESSION_DAYS)), _utc()):
+        return False
+    try:
+        fd = os.open(SESSION_PATH, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w") as f:
+            f.write(token)
+        return True
+    except OSError as e:
+        print(f"Could not save session: {e}")
+        delete_session(_token_hash(token))
+        return False
+
+
+def load_session_token():
+    try:
+        with open(SESSION_PATH) as f:
+            return f.read().strip() or None
+    except OSError:
+        return None
+
+
+def resume_session(token):
+    """user_id for a saved token if its session is still valid, else None.
+
+    The token file is kept either way: None may just mean the server was
+    unreachable. A password login replaces or forgets it.
+    """
+    return get_session_user(_token_hash(token), _utc())
+
+
+def forget_session():
+    """Drop this machine's saved session, on the server too."""
+    token = load_session_token()
+    if token is None:
+        return
+    delete_session(_token_hash(token))
+    try:
+        os.remove(SESSION_PATH)
+    except OSError as e:
+        print(f"Could not remove session: {e}")
+
+
+def _get_dummy_hash():
+    global _dummy_hash
+    if _dummy_hash is None:
+        _dummy_hash = hash_password("not a password")
+    return _dummy_hash
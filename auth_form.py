@@ -1,11 +1,12 @@
 from PySide6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QStackedWidget,
-    QPushButton, QLineEdit, QLabel
+    QPushButton, QLineEdit, QLabel, QCheckBox
 )
-from PySide6.QtGui import QIcon, QPixmap
+from PySide6.QtGui import QIcon
 from PySide6.QtCore import Qt, QTimer
-from database import add_user, verify_user  
-import bcrypt
+from auth import add_user, login, remember_user, forget_session
+import db_async
+import themes
 
 # Styles
 WELCOME_BUTTON_STYLE = """
@@ -62,18 +63,18 @@ class LoginWindow(QWidget):
         
         self.user_id = None
         self.success_callback = lambda user_id: None
+        self.accepted_callback = lambda user_id, first_page: None
      
         self.background = QLabel(self)
-        self.background.setPixmap(QPixmap("images/theme0.jpg"))
-        self.background.setScaledContents(True)
         self.background.setGeometry(0, 0, 736, 413)
+        self.background.setPixmap(themes.pixmap("theme0", self.background.size()))
 
         self.stacked_widget = QStackedWidget()
         self.stacked_widget.setStyleSheet("background: transparent;")
 
         self.welcome_screen = WelcomeScreen(self.stacked_widget, self.handle_success)
-        self.login_screen = LoginScreen(self.stacked_widget, self.handle_success)
-        self.signup_screen = SignUpScreen(self.stacked_widget, self.handle_success)
+        self.login_screen = LoginScreen(self.stacked_widget, self.handle_success, self.handle_accepted)
+        self.signup_screen = SignUpScreen(self.stacked_widget, self.handle_success, self.handle_accepted)
         
         self.stacked_widget.addWidget(self.welcome_screen)
         self.stacked_widget.addWidget(self.login_screen)
@@ -89,6 +90,12 @@ class LoginWindow(QWidget):
         if self.success_callback and user_id:
             self.success_callback(user_id)
 
+    def handle_accepted(self, user_id, first_page=None):
+        # Comes a second before handle_success, while "Login successful!"
+        # is still showing; the caller can start loading the user's tasks.
+        if self.accepted_callback and user_id:
+            self.accepted_callback(user_id, first_page)
+
 class WelcomeScreen(QWidget):
     def __init__(self, stacked_widget, success_callback):
         super().__init__()
@@ -145,10 +152,11 @@ class WelcomeScreen(QWidget):
         self.stacked_widget.setCurrentIndex(2)
 
 class SignUpScreen(QWidget):
-    def __init__(self, stacked_widget, success_callback):
+    def __init__(self, stacked_widget, success_callback, accepted_callback):
         super().__init__()
         self.stacked_widget = stacked_widget
         self.success_callback = success_callback
+        self.accepted_callback = accepted_callback
         self.setStyleSheet("background: transparent;")
 
         main_layout = QVBoxLayout()
@@ -196,15 +204,15 @@ class SignUpScreen(QWidget):
         buttons_layout = QHBoxLayout()
         buttons_layout.setSpacing(10)
 
-        signup_button = QPushButton("Sign Up")
-        signup_button.setStyleSheet(FORM_BUTTON_STYLE)
-        signup_button.clicked.connect(self.create_account)
+        self.signup_button = QPushButton("Sign Up")
+        self.signup_button.setStyleSheet(FORM_BUTTON_STYLE)
+        self.signup_button.clicked.connect(self.create_account)
 
         back_button = QPushButton("Back")
         back_button.setStyleSheet(FORM_BUTTON_STYLE)
         back_button.clicked.connect(lambda: self.stacked_widget.setCurrentIndex(0))
 
-        buttons_layout.addWidget(signup_button)
+        buttons_layout.addWidget(self.signup_button)
         buttons_layout.addWidget(back_button)
 
         form_layout.addLayout(username_layout)
@@ -232,24 +240,32 @@ class SignUpScreen(QWidget):
             self.error_label.setText("Password must be 6+ characters")
             return
 
-        success = add_user(username, password)
-        if success:
+        self.signup_button.setEnabled(False)
+        self.error_label.setStyleSheet(ERROR_LABEL_STYLE)
+        self.error_label.setText("Creating account...")
+        db_async.submit(add_user, username, password).then(
+            self.account_created,
+            lambda error: self.account_created(None)
+        )
+
+    def account_created(self, user_id):
+        self.signup_button.setEnabled(not user_id)
+        if user_id:
             self.error_label.setText("Account created successfully!")
             self.error_label.setStyleSheet(SUCCESS_LABEL_STYLE)
-            QTimer.singleShot(1000, lambda: self.login_after_signup(username, password))
+            # add_user already returned the id; no second bcrypt check needed.
+            # A new account has no tasks to fetch.
+            self.accepted_callback(user_id, [])
+            QTimer.singleShot(1000, lambda: self.success_callback(user_id))
         else:
             self.error_label.setText("Username already exists!")
 
-    def login_after_signup(self, username, password):
-        user_id = verify_user(username, password)
-        if user_id:
-            self.success_callback(user_id)
-
 class LoginScreen(QWidget):
-    def __init__(self, stacked_widget, success_callback):
+    def __init__(self, stacked_widget, success_callback, accepted_callback):
         super().__init__()
         self.stacked_widget = stacked_widget
         self.success_callback = success_callback
+        self.accepted_callback = accepted_callback
         self.setStyleSheet("background: transparent;")
 
         main_layout = QVBoxLayout()
@@ -282,6 +298,8 @@ class LoginScreen(QWidget):
         password_layout.addWidget(password_label)
         password_layout.addWidget(self.password_input)
 
+        self.remember_checkbox = QCheckBox("Remember me")
+
         self.error_label = QLabel("")
         self.error_label.setStyleSheet(ERROR_LABEL_STYLE)
         self.error_label.setAlignment(Qt.AlignCenter)
@@ -289,19 +307,20 @@ class LoginScreen(QWidget):
         buttons_layout = QHBoxLayout()
         buttons_layout.setSpacing(10)
 
-        login_button = QPushButton("Login")
-        login_button.setStyleSheet(FORM_BUTTON_STYLE)
-        login_button.clicked.connect(self.check_credentials)
+        self.login_button = QPushButton("Login")
+        self.login_button.setStyleSheet(FORM_BUTTON_STYLE)
+        self.login_button.clicked.connect(self.check_credentials)
 
         back_button = QPushButton("Back")
         back_button.setStyleSheet(FORM_BUTTON_STYLE)
         back_button.clicked.connect(lambda: self.stacked_widget.setCurrentIndex(0))
 
-        buttons_layout.addWidget(login_button)
+        buttons_layout.addWidget(self.login_button)
         buttons_layout.addWidget(back_button)
 
         form_layout.addLayout(username_layout)
         form_layout.addLayout(password_layout)
+        form_layout.addWidget(self.remember_checkbox)
         form_layout.addWidget(self.error_label)
         form_layout.addLayout(buttons_layout)
 
@@ -315,11 +334,29 @@ class LoginScreen(QWidget):
             self.error_label.setText("Please fill in all fields!")
             return
 
-        user_id = verify_user(username, password)
-        
-        if user_id:
+        self.login_button.setEnabled(False)
+        self.error_label.setStyleSheet(ERROR_LABEL_STYLE)
+        self.error_label.setText("Checking credentials...")
+        db_async.submit(login, username, password).then(
+            self.credentials_checked,
+            lambda error: self.credentials_checked(None)
+        )
+
+    def credentials_checked(self, result):
+        # Left off after a success: the window closes a second later, and
+        # a second login meanwhile would load the user's tasks twice.
+        self.login_button.setEnabled(not result)
+        if result:
+            user_id, first_page = result
             self.error_label.setText("Login successful!")
             self.error_label.setStyleSheet(SUCCESS_LABEL_STYLE)
+            # Next launch skips this screen (main.py) only if asked to;
+            # otherwise any session saved earlier is dropped.
+            if self.remember_checkbox.isChecked():
+                db_async.submit(remember_user, user_id)
+            else:
+                db_async.submit(forget_session)
+            self.accepted_callback(user_id, first_page)
             QTimer.singleShot(1000, lambda: self.success_callback(user_id))
         else:
             self.error_label.setText("Invalid username or password!")
\ No newline at end of file
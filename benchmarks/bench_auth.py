@@ -0,0 +1,61 @@
+"""Signup and login latency at several bcrypt cost factors.
+
+Runs against a scratch SQLite database by default, so the numbers are
+mostly bcrypt; pass --backend mysql to include the server round-trip.
+
+    python benchmarks/bench_auth.py --rounds 10 11 12 13 --iterations 20
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import auth
+import database
+from db_metrics import percentile
+
+
+def timed(fn, iterations):
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return statistics.median(samples), percentile(samples, 0.95)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--backend", choices=("mysql", "sqlite"), default="sqlite")
+    parser.add_argument("--rounds", type=int, nargs="+", default=[10, 11, 12, 13])
+    parser.add_argument("--iterations", type=int, default=20)
+    args = parser.parse_args()
+
+    if args.backend == "sqlite":
+        database.SQLITE_PATH = os.path.join(tempfile.mkdtemp(), "bench_auth.db")
+    if not database.init_db(backend=args.backend):
+        sys.exit(f"Could not open the {args.backend} database")
+
+    run = str(int(time.time()))
+    print(f"{'rounds':>6} {'signup p50':>12} {'login p50':>12} {'login p95':>12} {'bad login p50':>14}")
+    for rounds in args.rounds:
+        auth.BCRYPT_ROUNDS = rounds
+        auth._dummy_hash = None
+        counter = iter(range(args.iterations))
+        signup, _ = timed(lambda: auth.add_user(f"bench-{run}-{rounds}-{next(counter)}", "bench-password"),
+                          args.iterations)
+        username = f"bench-{run}-{rounds}-0"
+        login_p50, login_p95 = timed(lambda: auth.verify_user(username, "bench-password"), args.iterations)
+        bad_p50, _ = timed(lambda: auth.verify_user(username, "wrong-password"), args.iterations)
+        print(f"{rounds:>6} {signup:>9.1f} ms {login_p50:>9.1f} ms {login_p95:>9.1f} ms {bad_p50:>11.1f} ms")
+
+    database.close_db()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""Per-operation latency of database.py: connect-per-call vs the connection pool.
+
+Run from the repo root; the same workload runs against either backend:
+
+    python benchmarks/bench_db.py --backend mysql --iterations 200
+    python benchmarks/bench_db.py --backend sqlite --iterations 200
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import database
+from db_metrics import percentile
+from migrations import MIGRATIONS
+
+
+def legacy_connect():
+    # What connect_db() did before pooling: a fresh connection plus the
+    # CREATE TABLE IF NOT EXISTS bootstrap on every call.
+    backend = database.get_backend()
+    conn = backend.connect()
+    cursor = conn.cursor()
+    for statement in MIGRATIONS[0][2][backend.name]:
+        cursor.execute(statement)
+    conn.commit()
+    return conn
+
+
+def ensure_bench_user():
+    conn = database.connect_db()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT user_id FROM users WHERE username = %s", ("__bench__",))
+        row = cursor.fetchone()
+        if row:
+            return row[0]
+        cursor.execute("INSERT INTO users (username, password) VALUES (%s, %s)", ("__bench__", "x"))
+        conn.commit()
+        return cursor.lastrowid
+    finally:
+        conn.close()
+
+
+def measure(label, fn, iterations):
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    p95 = percentile(samples, 0.95)
+    print(f"{label:<40} mean {statistics.mean(samples):8.3f} ms   "
+          f"p50 {statistics.median(samples):8.3f} ms   p95 {p95:8.3f} ms")
+
+
+def run_suite(mode, user_id, task_id, iterations):
+    ops = {
+        "get_user_tasks": lambda: database.get_user_tasks(user_id),
+        "update_task_details": lambda: database.update_task_details(task_id, "bench", "2030-01-01", 0),
+        "save_task+delete_task": lambda: database.delete_task(database.save_task(user_id, "tmp", "2030-01-01")),
+    }
+    for name, fn in ops.items():
+        measure(f"[{mode}] {name}", fn, iterations)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=100)
+    parser.add_argument("--pool-size", type=int, default=database.POOL_SIZE)
+    parser.add_argument("--backend", choices=("mysql", "sqlite"), default=database.DB_BACKEND)
+    args = parser.parse_args()
+
+    if not database.init_db(pool_size=args.pool_size, backend=args.backend):
+        sys.exit(f"Could not open the {args.backend} database")
+
+    user_id = ensure_bench_user()
+    task_id = database.save_task(user_id, "bench", "2030-01-01")
+    try:
+        run_suite("pooled", user_id, task_id, args.iterations)
+
+        pooled_connect = database.connect_db
+        database.connect_db = legacy_connect
+        try:
+            run_suite("connect-per-call", user_id, task_id, args.iterations)
+        finally:
+            database.connect_db = pooled_connect
+    finally:
+        database.delete_task(task_id)
+        database.close_db()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""Task query plans and latencies on a synthetic dataset, before and after the index migration.
+
+Builds a scratch database at schema version 1 (no secondary indexes), times
+the hot task queries, applies the remaining migrations and times them again.
+
+    python benchmarks/bench_queries.py --rows 1000000 --users 2000
+    python benchmarks/bench_queries.py --backend mysql --mysql-database saku_bench
+
+The MySQL run drops and recreates the --mysql-database schema, so never
+point it at real data.
+"""
+import argparse
+import datetime
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import database
+from db_metrics import percentile
+from migrations import migrate
+from storage import create_backend
+
+INSERT_BATCH = 10000
+
+QUERIES = {
+    "page by task_id": (
+        "SELECT task_id, task_text, due_date, is_completed FROM tasks "
+        "WHERE user_id = %s AND task_id > %s ORDER BY task_id LIMIT 50",
+        lambda user_id: (user_id, 0),
+    ),
+    "latest task_id": (
+        "SELECT task_id FROM tasks WHERE user_id = %s ORDER BY task_id DESC LIMIT 1",
+        lambda user_id: (user_id,),
+    ),
+    "sorted by due date": (
+        "SELECT task_id, due_date FROM tasks WHERE user_id = %s ORDER BY due_date LIMIT 50",
+        lambda user_id: (user_id,),
+    ),
+    "pending count": (
+        "SELECT COUNT(*) FROM tasks WHERE user_id = %s AND is_completed = 0",
+        lambda user_id: (user_id,),
+    ),
+}
+
+
+def open_backend(args):
+    if args.backend == "sqlite":
+        path = os.path.join(tempfile.mkdtemp(), "bench_queries.db")
+        return create_backend("sqlite", sqlite_path=path)
+
+    config = dict(database.DB_CONFIG)
+    config.pop("database", None)
+    server = create_backend("mysql", mysql_config=config).connect()
+    cursor = server.cursor()
+    cursor.execute(f"DROP DATABASE IF EXISTS `{args.mysql_database}`")
+    cursor.execute(f"CREATE DATABASE `{args.mysql_database}`")
+    server.close()
+    config["database"] = args.mysql_database
+    return create_backend("mysql", mysql_config=config)
+
+
+def populate(conn, rows, users):
+    cursor = conn.cursor()
+    cursor.executemany(
+        "INSERT INTO users (username, password) VALUES (%s, %s)",
+        [(f"user{i}", "x") for i in range(users)]
+    )
+    conn.commit()
+
+    rng = random.Random(42)
+    start = datetime.date(2024, 1, 1)
+    inserted = 0
+    while inserted < rows:
+        batch = min(INSERT_BATCH, rows - inserted)
+        cursor.executemany(
+            "INSERT INTO tasks (user_id, task_text, due_date, is_completed) VALUES (%s, %s, %s, %s)",
+            [
+                (rng.randint(1, users), f"task {inserted + i}",
+                 start + datetime.timedelta(days=rng.randint(0, 1000)), rng.random() < 0.5)
+                for i in range(batch)
+            ]
+        )
+        conn.commit()
+        inserted += batch
+
+
+def explain(conn, dialect, query, params):
+    cursor = conn.cursor()
+    prefix = "EXPLAIN QUERY PLAN " if dialect == "sqlite" else "EXPLAIN "
+    cursor.execute(prefix + query, params)
+    return [" | ".join(str(value) for value in row) for row in cursor.fetchall()]
+
+
+def run_queries(conn, dialect, users, iterations, label):
+    rng = random.Random(7)
+    print(f"\n== {label} ==")
+    for name, (query, make_params) in QUERIES.items():
+        cursor = conn.cursor()
+        samples = []
+        for _ in range(iterations):
+            params = make_params(rng.randint(1, users))
+            start = time.perf_counter()
+            cursor.execute(query, params)
+            cursor.fetchall()
+            samples.append((time.perf_counter() - start) * 1000)
+        samples.sort()
+        print(f"{name:<20} p50 {statistics.median(samples):8.3f} ms   "
+              f"p95 {percentile(samples, 0.95):8.3f} ms")
+        for line in explain(conn, dialect, query, make_params(1)):
+            print(f"    plan: {line}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--backend", choices=("mysql", "sqlite"), default="sqlite")
+    parser.add_argument("--mysql-database", default="saku_bench")
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+
+    backend = open_backend(args)
+    conn = backend.connect()
+    try:
+        migrate(conn, backend.name, target=1)
+        start = time.perf_counter()
+        populate(conn, args.rows, args.users)
+        print(f"inserted {args.rows} tasks for {args.users} users in {time.perf_counter() - start:.1f}s")
+
+        run_queries(conn, backend.name, args.users, args.iterations, "schema v1 (no task indexes)")
+
+        start = time.perf_counter()
+        applied = migrate(conn, backend.name)
+        print(f"\napplied migrations {applied} in {time.perf_counter() - start:.1f}s")
+        run_queries(conn, backend.name, args.users, args.iterations, "latest schema")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,296 @@
+"""Repeatable benchmarks of the data layer and the task window, written as JSON for regression checks.
+
+    python benchmarks/bench_suite.py --output baseline.json
+    python benchmarks/bench_suite.py --backends sqlite mysql --mysql-database saku_bench
+    python benchmarks/bench_suite.py --compare baseline.json --output after.json
+
+Every case runs on scratch data: a temporary SQLite file, or a MySQL
+database that is dropped and recreated (never point --mysql-database at
+real data); a MySQL server that can't be reached is recorded as skipped.
+Qt cases run offscreen against SQLite. Each case runs once to warm up and
+then --repeat times; the JSON has the median, p95 and min of those runs.
+With --compare, any median more than --tolerance slower than the
+baseline's is reported and the exit status is 1.
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO)
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+# Local files the task window keeps; set before anything imports them.
+SCRATCH = tempfile.mkdtemp(prefix="saku_bench_")
+os.environ["SAKU_TASK_CACHE_PATH"] = os.path.join(SCRATCH, "task_cache.db")
+os.environ["SAKU_JOURNAL_PATH"] = os.path.join(SCRATCH, "task_journal.db")
+
+import auth
+import database
+from db_metrics import percentile
+
+DB_SEED_TASKS = 1000
+
+
+class Results:
+    def __init__(self, repeat):
+        self.repeat = repeat
+        self.cases = []
+
+    def time(self, name, run, setup=None, unit="ms", per_call=1):
+        """Warm up once, then time `repeat` runs of run(state); setup() (untimed) makes each run's state."""
+        samples = []
+        for i in range(self.repeat + 1):
+            state = setup() if setup else None
+            start = time.perf_counter()
+            run(state)
+            elapsed = time.perf_counter() - start
+            if i:
+                samples.append(elapsed * (1e6 if unit == "us" else 1e3) / per_call)
+        samples.sort()
+        case = {
+            "name": name,
+            "unit": unit,
+            "runs": len(samples),
+            "median": statistics.median(samples),
+            "p95": percentile(samples, 0.95),
+            "min": samples[0],
+        }
+        self.cases.append(case)
+        print(f"{name:<36} median {case['median']:10.3f} {unit:<2}  p95 {case['p95']:10.3f}  "
+              f"min {case['min']:10.3f}", file=sys.stderr)
+
+    def skip(self, name, reason):
+        self.cases.append({"name": name, "skipped": reason})
+        print(f"{name:<36} skipped: {reason}", file=sys.stderr)
+
+
+def open_database(backend, mysql_database):
+    if backend == "sqlite":
+        database.SQLITE_PATH = os.path.join(SCRATCH, f"bench_{time.time_ns()}.db")
+    else:
+        config = dict(database.DB_CONFIG)
+        config.pop("database", None)
+        from storage import create_backend
+        server = create_backend("mysql", mysql_config=config).connect()
+        cursor = server.cursor()
+        cursor.execute(f"DROP DATABASE IF EXISTS `{mysql_database}`")
+        cursor.execute(f"CREATE DATABASE `{mysql_database}`")
+        server.close()
+        database.DB_CONFIG = dict(config, database=mysql_database)
+    return database.init_db(backend=backend)
+
+
+def seed_user(username, task_count):
+    # Only the "bench" user logs in; the rest skip the bcrypt cost.
+    user_id = database.create_user(username, "bench")
+    database.save_tasks_many(user_id, (
+        (f"seeded task {i}", f"2030-{i % 12 + 1:02d}-{i % 28 + 1:02d}", 1 if i % 3 == 0 else 0)
+        for i in range(task_count)
+    ))
+    return user_id
+
+
+def bench_database(results, backend):
+    prefix = f"db.{backend}"
+    user_id = seed_user("bench", DB_SEED_TASKS)
+    database.update_user_password(user_id, auth.hash_password("bench-password"))
+    task_id = database.save_task(user_id, "bench task", "2030-01-01")
+
+    results.time(f"{prefix}.insert", lambda _: database.save_task(user_id, "inserted task", "2030-01-01"))
+    results.time(f"{prefix}.update", lambda _: database.update_task_details(task_id, "updated task", "2030-01-02", 1))
+    results.time(f"{prefix}.list_page", lambda _: database.get_user_tasks_page(user_id, 0))
+    results.time(f"{prefix}.search", lambda _: database.query_tasks(user_id, text="seeded", status="pending", sort="due"))
+    results.time(f"{prefix}.stats", lambda _: database.get_task_stats(user_id))
+    results.time(f"{prefix}.verify_user", lambda _: auth.verify_user("bench", "bench-password"))
+
+
+def wait_until(app, done, timeout=60):
+    deadline = time.perf_counter() + timeout
+    while not done():
+        if time.perf_counter() > deadline:
+            raise TimeoutError("benchmark case did not finish")
+        app.processEvents()
+        time.sleep(0.0002)
+
+
+def settle(app, window=None):
+    # Let the background syncs and journal replays a run started finish
+    # before the next one is timed.
+    import db_async
+    if window is not None:
+        window.close()
+        window.deleteLater()
+    for _ in range(3):
+        db_async.wait_for_writes()
+        db_async.wait_for_local()
+        app.processEvents()
+
+
+def bench_window(results, sizes):
+    from PySide6.QtWidgets import QApplication
+    from database import TASK_PAGE_SIZE
+    import saku
+    import themes
+
+    app = QApplication.instance() or QApplication(sys.argv)
+    # Theme images and music are looked up relative to the repo root.
+    os.chdir(REPO)
+    windows = []
+
+    def built(_):
+        windows.append(saku.MainWindow())
+
+    results.time("qt.main_window_build", built, setup=lambda: settle(app, windows.pop() if windows else None))
+    settle(app, windows.pop())
+
+    for size in sizes:
+        # Cold: a user this machine has never cached; done once the first
+        # page is on screen. Warm: the same user again, all rows from the cache.
+        fresh_users = iter([seed_user(f"cold-{size}-{i}", size) for i in range(results.repeat + 1)])
+        warm_user = seed_user(f"warm-{size}", size)
+
+        def new_window(user_id):
+            window = saku.MainWindow()
+            windows.append(window)
+            return window, user_id
+
+        def load(state, rows_expected):
+            window, user_id = state
+            window.set_user(user_id)
+            wait_until(app, lambda: window.task_model.rowCount() >= rows_expected)
+
+        def next_cold():
+            settle(app, windows.pop() if windows else None)
+            return new_window(next(fresh_users))
+
+        def next_warm():
+            settle(app, windows.pop() if windows else None)
+            return new_window(warm_user)
+
+        results.time(f"qt.load_user_tasks.cold.{size}", lambda state: load(state, min(size, TASK_PAGE_SIZE)),
+                     setup=next_cold)
+        # One untimed load fills the cache for the warm runs.
+        first = new_window(warm_user)
+        load(first, min(size, TASK_PAGE_SIZE))
+        results.time(f"qt.load_user_tasks.warm.{size}", lambda state: load(state, size), setup=next_warm)
+    settle(app, windows.pop() if windows else None)
+
+    window = saku.MainWindow()
+    window.show()
+    themes.preload(window.size())
+    themes.shutdown()
+    app.processEvents()
+    names = list(themes.THEME_FILES)
+
+    def switch(_):
+        for name in names:
+            window.apply_theme(name)
+            window.repaint()
+
+    results.time("qt.theme_switch", switch, per_call=len(names))
+
+    calls = 1000
+    window.task_model.add_counts(10000, 3333)
+    results.time("qt.update_progress", lambda _: [window.update_progress() for _ in range(calls)],
+                 unit="us", per_call=calls)
+    settle(app, window)
+
+
+def environment():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], cwd=REPO, capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    import PySide6
+    return {
+        "commit": commit,
+        "python": platform.python_version(),
+        "pyside6": PySide6.__version__,
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "bcrypt_rounds": auth.BCRYPT_ROUNDS,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+    }
+
+
+def compare(cases, baseline_path, tolerance):
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = {case["name"]: case for case in json.load(f)["cases"] if "median" in case}
+    regressed = []
+    print(f"\n{'case':<36} {'baseline':>10} {'now':>10} {'change':>8}", file=sys.stderr)
+    for case in cases:
+        before = baseline.get(case["name"])
+        if before is None or "median" not in case or before["median"] <= 0:
+            continue
+        change = case["median"] / before["median"] - 1
+        flag = "  REGRESSED" if change > tolerance else ""
+        print(f"{case['name']:<36} {before['median']:10.3f} {case['median']:10.3f} {change:+8.1%}{flag}",
+              file=sys.stderr)
+        if flag:
+            regressed.append(case["name"])
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--backends", nargs="+", choices=("sqlite", "mysql"), default=["sqlite", "mysql"])
+    parser.add_argument("--mysql-database", default="saku_bench")
+    parser.add_argument("--suites", nargs="+", choices=("db", "qt"), default=["db", "qt"])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000],
+                        help="task counts for the load_user_tasks cases")
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--bcrypt-rounds", type=int, default=auth.BCRYPT_ROUNDS)
+    parser.add_argument("--output", default="-", help="JSON results file, - for stdout")
+    parser.add_argument("--compare", help="earlier --output file to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed slowdown, 0.2 = 20%%")
+    args = parser.parse_args()
+    # The Qt cases chdir to the repo root; paths given relative to where the
+    # suite was started must not follow them there.
+    args.output = args.output if args.output == "-" else os.path.abspath(args.output)
+    args.compare = args.compare and os.path.abspath(args.compare)
+
+    auth.BCRYPT_ROUNDS = args.bcrypt_rounds
+    results = Results(args.repeat)
+    try:
+        if "db" in args.suites:
+            for backend in args.backends:
+                try:
+                    opened = open_database(backend, args.mysql_database)
+                except Exception as e:
+                    opened = False
+                    print(f"Could not open {backend}: {e}", file=sys.stderr)
+                if not opened:
+                    results.skip(f"db.{backend}", "database unavailable")
+                    continue
+                bench_database(results, backend)
+                database.close_db()
+        if "qt" in args.suites:
+            if not open_database("sqlite", None):
+                sys.exit("Could not open a scratch SQLite database")
+            bench_window(results, args.sizes)
+            database.close_db()
+    finally:
+        shutil.rmtree(SCRATCH, ignore_errors=True)
+
+    report = {"environment": environment(), "repeat": args.repeat, "cases": results.cases}
+    if args.output == "-":
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    else:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    if args.compare and compare(results.cases, args.compare, args.tolerance):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+"""Time to build and first-paint a task list of N rows: per-row styled widgets vs model/view.
+
+"widgets" rebuilds the list the way MainWindow.load_user_tasks used to: a
+QWidget row per task, each child with its own setStyleSheet() string.
+"model" feeds the same rows to TaskListModel/TaskDelegate under the single
+window-level stylesheet.
+
+    QT_QPA_PLATFORM=offscreen python benchmarks/bench_task_list.py --rows 5000
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PySide6.QtWidgets import (
+    QApplication, QWidget, QVBoxLayout, QHBoxLayout, QScrollArea,
+    QCheckBox, QLineEdit, QDateEdit, QPushButton, QListView, QAbstractItemView
+)
+from styles import MAIN_WINDOW_STYLE
+from task_model import TaskListModel, TaskDelegate, parse_date
+
+# The per-row strings the old code applied, kept as they were so the
+# baseline doesn't follow later stylesheet changes; what matters is that
+# each widget parses its own copy.
+LEGACY_DATE_STYLE = """
+    QDateEdit {
+        background-color: white;
+        border: 1px solid #5A7EC9;
+        border-radius: 5px;
+        padding: 2px;
+    }
+    QDateEdit[urgency="overdue"] {
+        border-color: rgb(255, 0, 0);
+    }
+    QDateEdit[urgency="today"] {
+        border-color: rgb(255, 140, 0);
+    }
+    QDateEdit[urgency="week"] {
+        border-color: rgb(255, 215, 0);
+    }
+    QDateEdit[urgency="done"] {
+        border-color: rgb(50, 200, 50);
+    }
+    QDateEdit::drop-down {
+        subcontrol-origin: padding;
+        subcontrol-position: top right;
+        width: 20px;
+        border-left: 1px solid #5A7EC9;
+    }
+    QDateEdit::down-arrow {
+        color: gray;
+        width: 16px;
+        height: 16px;
+    }
+    QCalendarWidget {
+        background-color: white;
+        color: black;
+    }
+    QCalendarWidget QToolButton {
+        background-color: #5A7EC9;
+        color: white;
+        border-radius: 5px;
+    }
+    QCalendarWidget QMenu {
+        background-color: white;
+        color: black;
+    }
+    QCalendarWidget QWidget#qt_calendar_navigationbar {
+        background-color: #5A7EC9;
+        color: white;
+    }
+    QCalendarWidget QAbstractItemView {
+        background-color: white;
+        color: black;
+    }
+    QCalendarWidget QAbstractItemView:disabled {
+        color: gray;
+    }
+"""
+LEGACY_ROW_STYLE = """
+    background: rgba(173, 216, 230, 0.3);
+    border-radius: 5px;
+    padding: 5px;
+"""
+LEGACY_DELETE_STYLE = """
+    QPushButton {
+        background-color: transparent;
+        border: none;
+        font-size: 14px;
+        color: black;
+    }
+"""
+
+
+def make_rows(count):
+    return [
+        {"task_id": i, "task_text": f"task {i}", "due_date": "2030-01-01", "is_completed": i % 2}
+        for i in range(1, count + 1)
+    ]
+
+
+def build_widgets(container, rows):
+    scroll_area = QScrollArea(container)
+    scroll_area.setWidgetResizable(True)
+    scroll_area.setStyleSheet("background: transparent; border: none;")
+    scroll_widget = QWidget()
+    scroll_layout = QVBoxLayout(scroll_widget)
+    for task in rows:
+        task_widget = QWidget()
+        task_layout = QHBoxLayout(task_widget)
+        checkbox = QCheckBox()
+        checkbox.setChecked(bool(task["is_completed"]))
+        task_layout.addWidget(checkbox)
+        task_edit = QLineEdit(task["task_text"])
+        task_edit.setStyleSheet("border: none; background: transparent; color: black;")
+        task_layout.addWidget(task_edit)
+        date_input = QDateEdit()
+        date_input.setCalendarPopup(True)
+        date_input.setDate(parse_date(task["due_date"]))
+        date_input.setStyleSheet(LEGACY_DATE_STYLE)
+        task_layout.addWidget(date_input)
+        delete_button = QPushButton("🗑️")
+        delete_button.setStyleSheet(LEGACY_DELETE_STYLE)
+        task_layout.addWidget(delete_button)
+        task_widget.setStyleSheet(LEGACY_ROW_STYLE)
+        scroll_layout.addWidget(task_widget)
+    scroll_area.setWidget(scroll_widget)
+    container.layout().addWidget(scroll_area)
+
+
+def build_model(container, rows):
+    model = TaskListModel(container)
+    view = QListView(container)
+    view.setObjectName("taskList")
+    view.setModel(model)
+    view.setItemDelegate(TaskDelegate(container))
+    view.setUniformItemSizes(True)
+    view.setEditTriggers(QAbstractItemView.NoEditTriggers)
+    model.append_page(rows, len(rows) + 1)
+    container.layout().addWidget(view)
+
+
+def measure(label, build, rows, app):
+    tracemalloc.start()
+    start = time.perf_counter()
+    container = QWidget()
+    container.setStyleSheet(MAIN_WINDOW_STYLE)
+    QVBoxLayout(container)
+    container.resize(520, 400)
+    build(container, rows)
+    container.show()
+    app.processEvents()
+    container.grab()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    widgets = len(container.findChildren(QWidget))
+    print(f"{label:<8} {len(rows)} rows: {elapsed * 1000:9.1f} ms to first paint, "
+          f"{widgets} widgets, peak Python allocations {peak / 1024:8.0f} KiB")
+    container.close()
+    container.deleteLater()
+    app.processEvents()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=5000)
+    args = parser.parse_args()
+
+    app = QApplication(sys.argv)
+    rows = make_rows(args.rows)
+    measure("widgets", build_widgets, rows, app)
+    measure("model", build_model, rows, app)
+
+
+if __name__ == "__main__":
+    main()
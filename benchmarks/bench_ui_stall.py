@@ -0,0 +1,150 @@
+"""Event-loop stall time of the login and task screens under a slow simulated backend.
+
+A 5 ms probe timer runs on the GUI thread while the screens talk to a fake
+database that sleeps for --latency seconds per call; the longest gap between
+probe ticks is the worst freeze a user would have seen.
+
+    QT_QPA_PLATFORM=offscreen python benchmarks/bench_ui_stall.py --latency 0.3
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PySide6.QtCore import QEventLoop, QTimer
+from PySide6.QtWidgets import QApplication
+
+PROBE_MS = 5
+
+
+class StallProbe:
+    def __init__(self):
+        self.timer = QTimer()
+        self.timer.setInterval(PROBE_MS)
+        self.timer.timeout.connect(self.tick)
+        self.reset()
+
+    def reset(self):
+        self.last = time.perf_counter()
+        self.worst = 0.0
+
+    def tick(self):
+        now = time.perf_counter()
+        self.worst = max(self.worst, now - self.last)
+        self.last = now
+
+
+def slow_backend(latency, task_count):
+    tasks = [
+        {"task_id": i, "task_text": f"task {i}", "due_date": "2030-01-01", "is_completed": i % 2}
+        for i in range(1, task_count + 1)
+    ]
+
+    def delay(result):
+        def call(*args, **kwargs):
+            time.sleep(latency)
+            return result
+        return call
+
+    return {
+        "login": delay((1, tasks[:50])),
+        "add_user": delay(1),
+        "get_user_tasks": delay(tasks),
+        "get_user_tasks_page": lambda user_id, after_task_id, limit: delay(
+            [task for task in tasks if task["task_id"] > after_task_id][:limit]
+        )(),
+        "get_task_stats": delay((task_count, task_count // 2)),
+        "query_tasks": lambda user_id, text="", after=None, **filters: delay(
+            [task for task in tasks if text in task["task_text"]
+             and task["task_id"] > (after["task_id"] if after else 0)][:50]
+        )(),
+        "forget_session": lambda: None,
+        # A cold local cache, so the window pages from the fake server.
+        "load_cached_tasks": lambda user_id: ([], None),
+        "sync_task_cache": delay(None),
+        # The journal is local; only its replay to the server is slow.
+        "append_entries": lambda entries: True,
+        "pending_entries": lambda user_id: [],
+        "replay_journal": delay(({}, False)),
+        "save_task": delay(task_count + 1),
+        "delete_task": delay(True),
+        "update_tasks_many": delay(True),
+    }
+
+
+def patch_backend(fakes):
+    import auth_form
+    import saku
+    import task_service
+    import task_sync
+    import write_behind
+    for module in (auth_form, saku, task_service, task_sync, write_behind):
+        for name, fake in fakes.items():
+            if hasattr(module, name):
+                setattr(module, name, fake)
+
+
+def run_for(seconds):
+    loop = QEventLoop()
+    QTimer.singleShot(int(seconds * 1000), loop.quit)
+    loop.exec()
+
+
+def measure(label, probe, action, settle):
+    probe.reset()
+    action()
+    run_for(settle)
+    print(f"{label:<24} worst event-loop stall {probe.worst * 1000:8.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--latency", type=float, default=0.3)
+    parser.add_argument("--tasks", type=int, default=50)
+    args = parser.parse_args()
+
+    app = QApplication(sys.argv)
+    patch_backend(slow_backend(args.latency, args.tasks))
+
+    from auth_form import LoginWindow
+    from saku import MainWindow
+    import db_async
+
+    probe = StallProbe()
+    probe.timer.start()
+    settle = args.latency * 2 + 0.2
+
+    login = LoginWindow()
+    login.login_screen.username_input.setText("bench")
+    login.login_screen.password_input.setText("bench-password")
+    measure("login", probe, login.login_screen.check_credentials, settle)
+
+    windows = []
+    measure("open main window", probe, lambda: windows.append(MainWindow(1)), settle)
+    window = windows[0]
+    measure("add task", probe, lambda: window.add_task("new task", "2030-01-01"), settle)
+
+    def type_title():
+        model = window.task_model
+        index = model.index(0)
+        for ch in "a forty character task title, typed out":
+            model.setData(index, model.data(index) + ch)
+
+    measure("type 40 chars", probe, type_title, settle + 0.5)
+
+    def type_search():
+        for length in range(1, 7):
+            window.search_input.setText("task 1"[:length])
+
+    measure("search as you type", probe, type_search, settle + 0.5)
+
+    window.close()
+    db_async.shutdown()
+    app.quit()
+
+
+if __name__ == "__main__":
+    main()
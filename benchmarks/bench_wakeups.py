@@ -0,0 +1,86 @@
+"""Timer wakeups per minute of the task window while it is shown, minimized and hidden.
+
+Counts every timer event the application delivers, whoever started the
+timer, so it measures the whole event loop rather than one component.
+
+    python benchmarks/bench_wakeups.py --seconds 20
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO)
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+SCRATCH = tempfile.mkdtemp(prefix="saku_bench_")
+os.environ["SAKU_TASK_CACHE_PATH"] = os.path.join(SCRATCH, "task_cache.db")
+os.environ["SAKU_JOURNAL_PATH"] = os.path.join(SCRATCH, "task_journal.db")
+
+from PySide6.QtCore import QObject, QEvent, QEventLoop, QTimer
+from PySide6.QtWidgets import QApplication
+
+import database
+
+
+class TimerCounter(QObject):
+    def __init__(self):
+        super().__init__()
+        self.count = 0
+
+    def eventFilter(self, obj, event):
+        if event.type() == QEvent.Timer:
+            self.count += 1
+        return False
+
+
+def measure(app, counter, seconds):
+    # Let the state change settle before counting.
+    app.processEvents()
+    counter.count = 0
+    loop = QEventLoop()
+    QTimer.singleShot(int(seconds * 1000), loop.quit)
+    loop.exec()
+    # The quit timer above is one of the events counted.
+    return (counter.count - 1) * 60 / seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=20)
+    args = parser.parse_args()
+
+    try:
+        database.SQLITE_PATH = os.path.join(SCRATCH, "bench_wakeups.db")
+        if not database.init_db(backend="sqlite"):
+            sys.exit("Could not open a scratch SQLite database")
+        user_id = database.create_user("bench", "bench")
+
+        app = QApplication(sys.argv)
+        os.chdir(REPO)
+        import saku
+        import db_async
+        window = saku.MainWindow()
+        window.set_user(user_id)
+        window.show()
+        db_async.wait_for_writes()
+        db_async.wait_for_local()
+
+        counter = TimerCounter()
+        app.installEventFilter(counter)
+        print(f"{'window':<12} {'wakeups/min':>12}")
+        for state, apply in (("shown", window.showNormal), ("minimized", window.showMinimized),
+                             ("hidden", window.hide), ("shown again", window.showNormal)):
+            apply()
+            print(f"{state:<12} {measure(app, counter, args.seconds):12.1f}")
+
+        window.close()
+        db_async.shutdown()
+        database.close_db()
+    finally:
+        shutil.rmtree(SCRATCH, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
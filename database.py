@@ -1,5 +1,15 @@
-import mysql.connector  
-import bcrypt
+import os
+import threading
+import time
+from itertools import islice
+from db_pool import ConnectionPool, PoolTimeout, POOL_SIZE
+from storage import create_backend
+from migrations import migrate
+from db_metrics import operation, instrument, record_error
+
+# "mysql" or "sqlite"; single-user installs can use the embedded SQLite file
+# and skip the network hop entirely.
+DB_BACKEND = os.environ.get("SAKU_DB_BACKEND", "mysql")
 
 DB_CONFIG = {
     "host": "localhost",
@@ -8,77 +18,251 @@ DB_CONFIG = {
     "database": "saku"  
 }
 
-def connect_db():
+SQLITE_PATH = os.environ.get("SAKU_SQLITE_PATH", "sakudo.db")
+
+TASK_PAGE_SIZE = 50
+BULK_BATCH_SIZE = 1000
+
+# query_tasks orderings: (ORDER BY, direction of the keyset comparison).
+TASK_SORTS = {
+    "created": ("task_id", ">"),
+    "newest": ("task_id DESC", "<"),
+    "due": ("due_date, task_id", None),
+}
+# InnoDB's FULLTEXT index skips words shorter than innodb_ft_min_token_size
+# (3 by default); shorter search terms fall back to LIKE.
+FULLTEXT_MIN_TOKEN = 3
+# How far behind the server clock get_task_changes() puts its watermark; a
+# write transaction that takes longer than this to commit could be missed.
+CHANGES_SAFETY_SECONDS = 60
+# Tombstones are kept this long; a cache last synced before that gets a
+# full listing instead of a delta.
+TOMBSTONE_DAYS = 90
+# The server clock, less CHANGES_SAFETY_SECONDS, and less TOMBSTONE_DAYS.
+CHANGES_CLOCK = {
+    "mysql": "SELECT CURRENT_TIMESTAMP(6) - INTERVAL %s SECOND AS watermark, "
+             "CURRENT_TIMESTAMP(6) - INTERVAL %s DAY AS horizon",
+    "sqlite": "SELECT strftime('%Y-%m-%d %H:%M:%f', 'now', '-' || %s || ' seconds') AS watermark, "
+              "strftime('%Y-%m-%d %H:%M:%f', 'now', '-' || %s || ' days') AS horizon",
+}
+# A day past TOMBSTONE_DAYS, so a sync that just passed the horizon check
+# never loses a tombstone it needs.
+PRUNE_TOMBSTONES = {
+    "mysql": "DELETE FROM task_tombstones WHERE deleted_at < CURRENT_TIMESTAMP(6) - INTERVAL %s DAY",
+    "sqlite": "DELETE FROM task_tombstones WHERE deleted_at < strftime('%Y-%m-%d %H:%M:%f', 'now', '-' || %s || ' days')",
+}
+
+_backend = None
+_pool = None
+_pool_lock = threading.RLock()
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        _backend = create_backend(DB_BACKEND, mysql_config=DB_CONFIG, sqlite_path=SQLITE_PATH)
+    return _backend
+
+def init_db(pool_size=POOL_SIZE, backend=None):
+    """Create the connection pool and bootstrap the schema once per process."""
+    global _backend
+    with _pool_lock:
+        if backend is not None:
+            _backend = create_backend(backend, mysql_config=DB_CONFIG, sqlite_path=SQLITE_PATH)
+        return _init_pool(pool_size)
+
+def _init_pool(pool_size):
+    global _pool
+    backend = get_backend()
+    pool = ConnectionPool(backend.connect, size=pool_size, is_alive=backend.is_alive)
+    try:
+        conn = pool.acquire()
+        try:
+            migrate(conn, backend.name)
+            _prune_tombstones(conn, backend)
+        finally:
+            conn.close()
+    except (backend.Error, PoolTimeout) as err:
+        print(f"Database Error: {err}")
+        pool.close_all()
+        return False
+
+    if _pool is not None:
+        _pool.close_all()
+    _pool = pool
+    return True
+
+def _prune_tombstones(conn, backend):
     try:
-        conn = mysql.connector.connect(**DB_CONFIG)
         cursor = conn.cursor()
-        
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS users (
-                user_id INT AUTO_INCREMENT PRIMARY KEY,
-                username VARCHAR(255) NOT NULL UNIQUE,
-                password VARCHAR(255) NOT NULL
-            )
-        ''')
-        
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS tasks (
-                task_id INT AUTO_INCREMENT PRIMARY KEY,
-                user_id INT NOT NULL,
-                task_text TEXT NOT NULL,
-                due_date DATE,
-                is_completed BOOLEAN DEFAULT FALSE,
-                FOREIGN KEY (user_id) REFERENCES users(user_id)
-            )
-        ''')
-        
+        cursor.execute(PRUNE_TOMBSTONES[backend.name], (TOMBSTONE_DAYS + 1,))
         conn.commit()
-        return conn
-    except mysql.connector.Error as err:
-        print(f"MySQL Error: {err}")
+    except backend.Error as err:
+        print(f"Error pruning task tombstones: {err}")
+
+def close_db():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close_all()
+            _pool = None
+
+def connect_db():
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None and not _init_pool(POOL_SIZE):
+                record_error()
+                return None
+    start = time.perf_counter()
+    try:
+        conn = _pool.acquire()
+    except (get_backend().Error, PoolTimeout) as err:
+        print(f"Database Error: {err}")
+        record_error()
         return None
+    # Inside a db_metrics operation, the connection times its queries.
+    return instrument(conn, time.perf_counter() - start)
+
+# Password hashing lives in auth.py; these only store and fetch the hashes.
 
-def add_user(username, password):
+@operation
+def create_user(username, password_hash):
+    """Insert a user; returns the new user_id, or None if the username is taken."""
     conn = connect_db()
     if not conn:
-        return False
-    
+        return None
     try:
-        
-        hashed_password = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt())
-        
         cursor = conn.cursor()
-        cursor.execute("INSERT INTO users (username, password) VALUES (%s, %s)", 
-                      (username, hashed_password))
+        cursor.execute("INSERT INTO users (username, password) VALUES (%s, %s)",
+                      (username, password_hash))
         conn.commit()
-        return True
-    except mysql.connector.IntegrityError:
-        return False  
+        return cursor.lastrowid
+    except get_backend().IntegrityError:
+        return None
     except Exception as e:
         print(f"Error adding user: {e}")
-        return False
+        return None
     finally:
         conn.close()
 
-def verify_user(username, password):
+@operation
+def get_user_credentials(username):
+    """(user_id, password_hash) for username, or None."""
     conn = connect_db()
     if not conn:
         return None
-    
     try:
         cursor = conn.cursor(dictionary=True)
         cursor.execute("SELECT user_id, password FROM users WHERE username = %s", (username,))
         user = cursor.fetchone()
-        
-        if user and bcrypt.checkpw(password.encode('utf-8'), user['password'].encode('utf-8')):
-            return user['user_id']
+        return (user['user_id'], user['password']) if user else None
+    except Exception as e:
+        print(f"Error verifying user: {e}")
+        return None
+    finally:
+        conn.close()
+
+@operation
+def get_user_login(username, limit=TASK_PAGE_SIZE):
+    """(user_id, password_hash, first page of tasks) for username in one round-trip, or None.
+
+    The page is the one get_user_tasks_page(user_id) would return. It is read
+    before the password is checked, so only auth.login() should hand it on.
+    """
+    conn = connect_db()
+    if not conn:
         return None
+    try:
+        cursor = conn.cursor(dictionary=True)
+        cursor.execute(
+            "SELECT u.user_id, u.password, t.task_id, t.task_text, t.due_date, t.is_completed "
+            "FROM users u LEFT JOIN ("
+            "SELECT task_id, user_id, task_text, due_date, is_completed FROM tasks "
+            "WHERE user_id = (SELECT user_id FROM users WHERE username = %s) "
+            "ORDER BY task_id LIMIT %s"
+            ") t ON t.user_id = u.user_id "
+            "WHERE u.username = %s ORDER BY t.task_id",
+            (username, limit, username)
+        )
+        rows = cursor.fetchall()
+        if not rows:
+            return None
+        page = [
+            {"task_id": row["task_id"], "task_text": row["task_text"],
+             "due_date": row["due_date"], "is_completed": row["is_completed"]}
+            for row in rows if row["task_id"] is not None
+        ]
+        return rows[0]["user_id"], rows[0]["password"], page
     except Exception as e:
         print(f"Error verifying user: {e}")
         return None
     finally:
         conn.close()
+
+@operation
+def update_user_password(user_id, password_hash):
+    conn = connect_db()
+    if not conn:
+        return False
+    try:
+        cursor = conn.cursor()
+        cursor.execute("UPDATE users SET password = %s WHERE user_id = %s", (password_hash, user_id))
+        conn.commit()
+        return cursor.rowcount > 0
+    finally:
+        conn.close()
         
+@operation
+def create_session(token_hash, user_id, expires_at, now):
+    """Store a session; expired ones are pruned on the way. Times are UTC "YYYY-MM-DD HH:MM:SS"."""
+    conn = connect_db()
+    if not conn:
+        return False
+    try:
+        cursor = conn.cursor()
+        cursor.execute("DELETE FROM sessions WHERE expires_at <= %s", (now,))
+        cursor.execute(
+            "INSERT INTO sessions (token_hash, user_id, expires_at) VALUES (%s, %s, %s)",
+            (token_hash, user_id, expires_at)
+        )
+        conn.commit()
+        return True
+    except get_backend().Error as err:
+        print(f"Error creating session: {err}")
+        return False
+    finally:
+        conn.close()
+
+@operation
+def get_session_user(token_hash, now):
+    """user_id of an unexpired session, or None."""
+    conn = connect_db()
+    if not conn:
+        return None
+    try:
+        cursor = conn.cursor()
+        cursor.execute(
+            "SELECT user_id FROM sessions WHERE token_hash = %s AND expires_at > %s",
+            (token_hash, now)
+        )
+        result = cursor.fetchone()
+        return result[0] if result else None
+    finally:
+        conn.close()
+
+@operation
+def delete_session(token_hash):
+    conn = connect_db()
+    if not conn:
+        return False
+    try:
+        cursor = conn.cursor()
+        cursor.execute("DELETE FROM sessions WHERE token_hash = %s", (token_hash,))
+        conn.commit()
+        return cursor.rowcount > 0
+    finally:
+        conn.close()
+
+@operation
 def get_user_id(username, password):
     conn = connect_db()
     if not conn:
@@ -91,6 +275,7 @@ def get_user_id(username, password):
     finally:
         conn.close()
 
+@operation
 def get_task_id(user_id):
     conn = connect_db()
     if not conn:
@@ -103,6 +288,7 @@ def get_task_id(user_id):
     finally:
         conn.close()
 
+@operation
 def save_task(user_id, task_text, due_date, is_completed=0):
     conn = connect_db()
     if not conn:
@@ -118,6 +304,7 @@ def save_task(user_id, task_text, due_date, is_completed=0):
     finally:
         conn.close()
 
+@operation
 def delete_task(task_id):
     conn = connect_db()
     if not conn:
@@ -130,6 +317,7 @@ def delete_task(task_id):
     finally:
         conn.close()
 
+@operation
 def update_task_details(task_id, new_text, due_date, is_completed):
     conn = connect_db()
     if not conn:
@@ -145,6 +333,85 @@ def update_task_details(task_id, new_text, due_date, is_completed):
     finally:
         conn.close()
 
+def _chunks(rows, size=BULK_BATCH_SIZE):
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, size))
+        if not chunk:
+            return
+        yield chunk
+
+@operation
+def save_tasks_many(user_id, tasks):
+    """Insert (task_text, due_date, is_completed) rows for one user in a single transaction.
+
+    tasks may be any iterable (e.g. a file being streamed); it is sent in
+    BULK_BATCH_SIZE multi-row inserts. Returns the number inserted, or None
+    if nothing was committed.
+    """
+    conn = connect_db()
+    if not conn:
+        return None
+    try:
+        cursor = conn.cursor()
+        inserted = 0
+        for chunk in _chunks(tasks):
+            cursor.executemany(
+                "INSERT INTO tasks (user_id, task_text, due_date, is_completed) VALUES (%s, %s, %s, %s)",
+                [(user_id, task_text, due_date, is_completed) for task_text, due_date, is_completed in chunk]
+            )
+            inserted += len(chunk)
+        conn.commit()
+        return inserted
+    except get_backend().Error as err:
+        print(f"Error saving tasks: {err}")
+        return None
+    finally:
+        conn.close()
+
+@operation
+def update_tasks_many(updates):
+    """Apply (task_id, text, due_date, is_completed) rows in a single transaction."""
+    conn = connect_db()
+    if not conn:
+        return False
+    try:
+        cursor = conn.cursor()
+        for chunk in _chunks(updates):
+            cursor.executemany(
+                "UPDATE tasks SET task_text = %s, due_date = %s, is_completed = %s WHERE task_id = %s",
+                [(text, due_date, is_completed, task_id) for task_id, text, due_date, is_completed in chunk]
+            )
+        conn.commit()
+        return True
+    except get_backend().Error as err:
+        print(f"Error updating tasks: {err}")
+        return False
+    finally:
+        conn.close()
+
+@operation
+def delete_tasks_many(task_ids):
+    """Delete the given task_ids in a single transaction; returns the number removed, or None on failure."""
+    conn = connect_db()
+    if not conn:
+        return None
+    try:
+        cursor = conn.cursor()
+        deleted = 0
+        for chunk in _chunks(task_ids):
+            placeholders = ", ".join(["%s"] * len(chunk))
+            cursor.execute(f"DELETE FROM tasks WHERE task_id IN ({placeholders})", chunk)
+            deleted += cursor.rowcount
+        conn.commit()
+        return deleted
+    except get_backend().Error as err:
+        print(f"Error deleting tasks: {err}")
+        return None
+    finally:
+        conn.close()
+
+@operation
 def get_user_tasks(user_id):
     conn = connect_db()
     if not conn:
@@ -156,5 +423,253 @@ def get_user_tasks(user_id):
             (user_id,)
         )
         return cursor.fetchall()
+    finally:
+        conn.close()
+
+@operation
+def get_task(user_id, task_id):
+    conn = connect_db()
+    if not conn:
+        return None
+    try:
+        cursor = conn.cursor(dictionary=True)
+        cursor.execute(
+            "SELECT task_id, task_text, due_date, is_completed FROM tasks WHERE task_id = %s AND user_id = %s",
+            (task_id, user_id)
+        )
+        return cursor.fetchone()
+    finally:
+        conn.close()
+
+@operation
+def get_task_stats(user_id):
+    """(total, completed) for a user from one aggregate query, or None on failure."""
+    conn = connect_db()
+    if not conn:
+        return None
+    try:
+        cursor = conn.cursor()
+        cursor.execute(
+            "SELECT COUNT(*), SUM(is_completed) FROM tasks WHERE user_id = %s",
+            (user_id,)
+        )
+        total, completed = cursor.fetchone()
+        return int(total or 0), int(completed or 0)
+    finally:
+        conn.close()
+
+@operation
+def get_user_tasks_page(user_id, after_task_id=0, limit=TASK_PAGE_SIZE):
+    """Keyset page of a user's tasks: the next `limit` rows with task_id > after_task_id."""
+    conn = connect_db()
+    if not conn:
+        return []
+    try:
+        cursor = conn.cursor(dictionary=True)
+        cursor.execute(
+            "SELECT task_id, task_text, due_date, is_completed FROM tasks "
+            "WHERE user_id = %s AND task_id > %s ORDER BY task_id LIMIT %s",
+            (user_id, after_task_id, limit)
+        )
+        return cursor.fetchall()
+    finally:
+        conn.close()
+
+def iter_user_tasks(user_id, batch_size=TASK_PAGE_SIZE):
+    """Yield a user's tasks in task_id order, one batch per round-trip."""
+    after_task_id = 0
+    while True:
+        batch = get_user_tasks_page(user_id, after_task_id, batch_size)
+        if batch:
+            yield batch
+        if len(batch) < batch_size:
+            return
+        after_task_id = batch[-1]["task_id"]
+
+def _search_terms(text):
+    # Words only: quotes and the FTS/boolean-mode operators are dropped so
+    # whatever the user types is a plain prefix search.
+    cleaned = "".join(ch if ch.isalnum() else " " for ch in text)
+    return cleaned.split()
+
+def _like_pattern(term):
+    return "%" + term.replace("!", "!!").replace("%", "!%").replace("_", "!_") + "%"
+
+def _text_filter(dialect, text):
+    """SQL condition and params matching tasks whose text has every word of `text` as a prefix."""
+    terms = _search_terms(text)
+    if not terms:
+        return None, []
+    if dialect == "sqlite":
+        match = " ".join(f'"{term}"*' for term in terms)
+        return "task_id IN (SELECT rowid FROM tasks_fts WHERE tasks_fts MATCH %s)", [match]
+
+    conditions, params = [], []
+    indexed = [term for term in terms if len(term) >= FULLTEXT_MIN_TOKEN]
+    if indexed:
+        conditions.append("MATCH (task_text) AGAINST (%s IN BOOLEAN MODE)")
+        params.append(" ".join(f"+{term}*" for term in indexed))
+    for term in terms:
+        if len(term) < FULLTEXT_MIN_TOKEN:
+            conditions.append("task_text LIKE %s ESCAPE '!'")
+            params.append(_like_pattern(term))
+    return " AND ".join(conditions), params
+
+@operation
+def query_tasks(user_id, text="", status=None, due_from=None, due_to=None, sort="created",
+                after=None, limit=TASK_PAGE_SIZE):
+    """One keyset page of a user's tasks matching a search, filtered and sorted on the server.
+
+    text matches words by prefix; status is "completed", "pending" or None
+    for both; due_from/due_to bound the due date, inclusive; sort is a key
+    of TASK_SORTS. `after` is the last row of the previous page.
+    """
+    order_by, direction = TASK_SORTS[sort]
+    conditions = ["user_id = %s"]
+    params = [user_id]
+
+    text_condition, text_params = _text_filter(get_backend().name, text)
+    if text_condition:
+        conditions.append(text_condition)
+        params += text_params
+    if status is not None:
+        conditions.append("is_completed = %s")
+        params.append(1 if status == "completed" else 0)
+    if due_from is not None:
+        conditions.append("due_date >= %s")
+        params.append(due_from)
+    if due_to is not None:
+        conditions.append("due_date <= %s")
+        params.append(due_to)
+
+    if after is not None:
+        if direction is not None:
+            conditions.append(f"task_id {direction} %s")
+            params.append(after["task_id"])
+        elif after["due_date"] is None:
+            # Both backends sort tasks without a due date first.
+            conditions.append("(due_date IS NOT NULL OR task_id > %s)")
+            params.append(after["task_id"])
+        else:
+            conditions.append("(due_date > %s OR (due_date = %s AND task_id > %s))")
+            params += [after["due_date"], after["due_date"], after["task_id"]]
+
+    conn = connect_db()
+    if not conn:
+        return None
+    try:
+        cursor = conn.cursor(dictionary=True)
+        cursor.execute(
+            "SELECT task_id, task_text, due_date, is_completed FROM tasks "
+            f"WHERE {' AND '.join(conditions)} ORDER BY {order_by} LIMIT %s",
+            params + [limit]
+        )
+        return cursor.fetchall()
+    except get_backend().Error as err:
+        print(f"Error searching tasks: {err}")
+        return None
+    finally:
+        conn.close()
+
+@operation
+def get_task_changes(user_id, since=None):
+    """Tasks changed and task_ids deleted since the `since` watermark (None for everything).
+
+    Returns (rows, deleted_ids, watermark), or None on failure. deleted_ids is
+    None when every task was sent instead, because since was None or older
+    than the tombstones kept (TOMBSTONE_DAYS); anything not in rows is gone.
+
+    The watermark is the server clock when the read began, less
+    CHANGES_SAFETY_SECONDS, rather than the newest stamp read: rows are
+    stamped when their statement runs but only seen once their transaction
+    commits, so another client's journal replay can still commit rows
+    stamped before this read. Each delta therefore sends the last window's
+    changes again; applying them twice is harmless.
+    """
+    conn = connect_db()
+    if not conn:
+        return None
+    try:
+        cursor = conn.cursor(dictionary=True)
+        cursor.execute(CHANGES_CLOCK[get_backend().name], (CHANGES_SAFETY_SECONDS, TOMBSTONE_DAYS))
+        clock = cursor.fetchone()
+        watermark = str(clock["watermark"])
+        columns = "task_id, task_text, due_date, is_completed"
+        if since is None or since < str(clock["horizon"]):
+            cursor.execute(f"SELECT {columns} FROM tasks WHERE user_id = %s", (user_id,))
+            return cursor.fetchall(), None, watermark
+        cursor.execute(
+            f"SELECT {columns} FROM tasks WHERE user_id = %s AND updated_at >= %s",
+            (user_id, since)
+        )
+        rows = cursor.fetchall()
+        cursor.execute(
+            "SELECT task_id FROM task_tombstones WHERE user_id = %s AND deleted_at >= %s",
+            (user_id, since)
+        )
+        return rows, [row["task_id"] for row in cursor.fetchall()], watermark
+    except get_backend().Error as err:
+        print(f"Error fetching task changes: {err}")
+        return None
+    finally:
+        conn.close()
+
+@operation
+def apply_task_journal(entries):
+    """Replay task journal entries (see task_journal.py) in order, in one transaction.
+
+    Returns {seq: task_id} for the adds, or None if nothing was committed.
+    Conflicts resolve without failing the batch: an add already applied by
+    an earlier, interrupted replay is found by its client_ref instead of
+    inserted again; an update or delete of a task that is gone on the
+    server is dropped (the delete wins); otherwise the journal, being the
+    later writer, overwrites the row. Updates and deletes journaled before
+    their task had a task_id name it by client_ref instead.
+    """
+    conn = connect_db()
+    if not conn:
+        return None
+    try:
+        cursor = conn.cursor()
+        added = {}
+        for entry in entries:
+            if entry["op"] == "add":
+                cursor.execute("SELECT task_id FROM tasks WHERE client_ref = %s", (entry["client_ref"],))
+                row = cursor.fetchone()
+                if row is None:
+                    cursor.execute(
+                        "INSERT INTO tasks (user_id, task_text, due_date, is_completed, client_ref) "
+                        "VALUES (%s, %s, %s, %s, %s)",
+                        (entry["user_id"], entry["task_text"], entry["due_date"],
+                         entry["is_completed"], entry["client_ref"])
+                    )
+                    added[entry["seq"]] = cursor.lastrowid
+                else:
+                    added[entry["seq"]] = row[0]
+                continue
+            task_id = entry["task_id"]
+            if task_id is None:
+                cursor.execute("SELECT task_id FROM tasks WHERE client_ref = %s", (entry["client_ref"],))
+                row = cursor.fetchone()
+                if row is None:
+                    continue
+                task_id = row[0]
+            if entry["op"] == "update":
+                cursor.execute(
+                    "UPDATE tasks SET task_text = %s, due_date = %s, is_completed = %s "
+                    "WHERE task_id = %s AND user_id = %s",
+                    (entry["task_text"], entry["due_date"], entry["is_completed"],
+                     task_id, entry["user_id"])
+                )
+            elif entry["op"] == "delete":
+                cursor.execute(
+                    "DELETE FROM tasks WHERE task_id = %s AND user_id = %s",
+                    (task_id, entry["user_id"])
+                )
+        conn.commit()
+        return added
+    except get_backend().Error as err:
+        print(f"Error replaying task journal: {err}")
+        return None
     finally:
         conn.close()
\ No newline at end of file
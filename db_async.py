@@ -0,0 +1,105 @@
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, Signal, Slot
+from db_pool import POOL_SIZE
+
+_read_pool = None
+_write_pool = None
+_local_pool = None
+_in_flight = set()
+
+
+class DbCall(QObject):
+    """Handle for a database call running on a worker thread.
+
+    succeeded/failed are always emitted on the GUI thread.
+    """
+    succeeded = Signal(object)
+    failed = Signal(object)
+    _done = Signal(object, object)
+
+    def __init__(self):
+        super().__init__()
+        self.pending = True
+        # self lives on the GUI thread, so this connection is queued when the
+        # worker emits _done.
+        self._done.connect(self._deliver)
+
+    @Slot(object, object)
+    def _deliver(self, result, error):
+        self.pending = False
+        _in_flight.discard(self)
+        if error is None:
+            self.succeeded.emit(result)
+        else:
+            self.failed.emit(error)
+
+    def then(self, on_result, on_error=None):
+        self.succeeded.connect(on_result)
+        if on_error:
+            self.failed.connect(on_error)
+        return self
+
+
+class _DbRunnable(QRunnable):
+    def __init__(self, call, fn, args, kwargs):
+        super().__init__()
+        self.call = call
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+
+    def run(self):
+        try:
+            result = self.fn(*self.args, **self.kwargs)
+        except Exception as e:
+            print(f"Background database call {self.fn.__name__} failed: {e}")
+            self.call._done.emit(None, e)
+        else:
+            self.call._done.emit(result, None)
+
+
+def _pools():
+    global _read_pool, _write_pool, _local_pool
+    if _read_pool is None:
+        _read_pool = QThreadPool()
+        _read_pool.setMaxThreadCount(POOL_SIZE)
+        # Writes share one thread so they reach the database in submit order.
+        _write_pool = QThreadPool()
+        _write_pool.setMaxThreadCount(1)
+        # Local files (the task journal) get their own ordered thread, so a
+        # slow or unreachable server never holds up a local write.
+        _local_pool = QThreadPool()
+        _local_pool.setMaxThreadCount(1)
+    return _read_pool, _write_pool, _local_pool
+
+
+def submit(fn, *args, serial=False, local=False, **kwargs):
+    read_pool, write_pool, local_pool = _pools()
+    call = DbCall()
+    _in_flight.add(call)
+    pool = local_pool if local else write_pool if serial else read_pool
+    pool.start(_DbRunnable(call, fn, args, kwargs))
+    return call
+
+
+def pending_calls():
+    """Calls submitted so far whose results haven't been delivered yet."""
+    return list(_in_flight)
+
+
+def wait_for_writes(timeout_ms=-1):
+    if _write_pool is None:
+        return True
+    return _write_pool.waitForDone(timeout_ms)
+
+
+def wait_for_local(timeout_ms=-1):
+    if _local_pool is None:
+        return True
+    return _local_pool.waitForDone(timeout_ms)
+
+
+def shutdown(timeout_ms=-1):
+    if _read_pool is None:
+        return True
+    return (_local_pool.waitForDone(timeout_ms) and _write_pool.waitForDone(timeout_ms)
+            and _read_pool.waitForDone(timeout_ms))
@@ -0,0 +1,330 @@
+"""Timing, row and error counts for database.py, aggregated per operation.
+
+Each public database.py function is an operation (@operation). While one
+runs, connect_db() hands out an instrumented connection whose cursors time
+every statement, count the rows it returned or touched, and count the ones
+that raised, including those the function catches and only prints. The
+time spent waiting for a pooled connection is recorded too.
+
+Finished operations go into fixed-bucket latency histograms, so memory
+stays flat however long the app runs; snapshot() estimates p50/p95/p99
+from them and write_prometheus() dumps them in the Prometheus text format.
+Statements slower than SLOW_QUERY_MS are printed and kept in a short log.
+Anything else can follow along with add_listener().
+
+SAKU_DB_METRICS=0 turns all of it off; connections are then handed out
+unwrapped.
+"""
+import bisect
+import functools
+import math
+import os
+import threading
+import time
+from collections import deque
+
+ENABLED = os.environ.get("SAKU_DB_METRICS", "1") != "0"
+SLOW_QUERY_MS = float(os.environ.get("SAKU_SLOW_QUERY_MS", "200"))
+SLOW_QUERY_LOG_SIZE = 50
+# Dump file for dashboards; nothing is written unless this is set.
+METRICS_PATH = os.environ.get("SAKU_METRICS_PATH")
+METRICS_INTERVAL = 15.0
+# Upper bounds of the latency buckets, in seconds.
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_lock = threading.Lock()
+_local = threading.local()
+_stats = {}
+_slow_queries = deque(maxlen=SLOW_QUERY_LOG_SIZE)
+_listeners = []
+_dump_thread = None
+
+
+def percentile(samples, fraction):
+    """Nearest-rank percentile of a sorted, non-empty list of samples (fraction=0.95 for p95)."""
+    # Rounded first so that, say, 0.95 * 20 isn't taken for a hair over 19.
+    rank = math.ceil(round(fraction * len(samples), 9))
+    return samples[max(rank, 1) - 1]
+
+
+class _OperationStats:
+    __slots__ = ("count", "errors", "rows", "queries", "seconds", "max_seconds", "acquire_seconds", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.rows = 0
+        self.queries = 0
+        self.seconds = 0.0
+        self.max_seconds = 0.0
+        self.acquire_seconds = 0.0
+        self.buckets = [0] * (len(BUCKETS) + 1)
+
+    def add(self, call):
+        self.count += 1
+        self.errors += call.errors
+        self.rows += call.rows
+        self.queries += call.queries
+        self.seconds += call.seconds
+        self.max_seconds = max(self.max_seconds, call.seconds)
+        self.acquire_seconds += call.acquire_seconds
+        self.buckets[bisect.bisect_left(BUCKETS, call.seconds)] += 1
+
+    def percentile(self, fraction):
+        """Estimate from the histogram, interpolating inside the bucket it falls in."""
+        if not self.count:
+            return 0.0
+        rank = fraction * self.count
+        seen = 0
+        for i, in_bucket in enumerate(self.buckets):
+            if in_bucket and seen + in_bucket >= rank:
+                low = BUCKETS[i - 1] if i else 0.0
+                high = BUCKETS[i] if i < len(BUCKETS) else self.max_seconds
+                return min(low + (high - low) * (rank - seen) / in_bucket, self.max_seconds)
+            seen += in_bucket
+        return self.max_seconds
+
+
+class _Call:
+    """What one operation did, filled in by its connection and cursors."""
+    __slots__ = ("name", "errors", "rows", "queries", "seconds", "acquire_seconds")
+
+    def __init__(self, name):
+        self.name = name
+        self.errors = 0
+        self.rows = 0
+        self.queries = 0
+        self.seconds = 0.0
+        self.acquire_seconds = 0.0
+
+
+def _current():
+    stack = getattr(_local, "calls", None)
+    return stack[-1] if stack else None
+
+
+def operation(fn):
+    """Record each call of fn as one operation named after it."""
+    if not ENABLED:
+        return fn
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        stack = getattr(_local, "calls", None)
+        if stack is None:
+            stack = _local.calls = []
+        call = _Call(fn.__name__)
+        stack.append(call)
+        start = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        except Exception:
+            call.errors += 1
+            raise
+        finally:
+            call.seconds = time.perf_counter() - start
+            stack.pop()
+            _finish(call)
+    return wrapper
+
+
+def _finish(call):
+    with _lock:
+        stats = _stats.get(call.name)
+        if stats is None:
+            stats = _stats[call.name] = _OperationStats()
+        stats.add(call)
+    for listener in _listeners:
+        try:
+            listener(call)
+        except Exception as e:
+            print(f"Metrics listener failed: {e}")
+
+
+def record_error():
+    """Count a failure outside any query, such as no connection to be had."""
+    call = _current()
+    if call is not None:
+        call.errors += 1
+
+
+def instrument(conn, acquire_seconds):
+    """Wrap a pooled connection so the running operation sees its queries."""
+    call = _current()
+    if not ENABLED or call is None:
+        return conn
+    call.acquire_seconds += acquire_seconds
+    return _Connection(conn, call)
+
+
+class _Connection:
+    __slots__ = ("_conn", "_call")
+
+    def __init__(self, conn, call):
+        self._conn = conn
+        self._call = call
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    # Called on every operation; spelled out to skip __getattr__.
+    def commit(self):
+        self._conn.commit()
+
+    def close(self):
+        self._conn.close()
+
+    def cursor(self, *args, **kwargs):
+        return _Cursor(self._conn.cursor(*args, **kwargs), self._call)
+
+
+class _Cursor:
+    __slots__ = ("_cursor", "_call")
+
+    def __init__(self, cursor, call):
+        self._cursor = cursor
+        self._call = call
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def _timed(self, method, query, params):
+        call = self._call
+        call.queries += 1
+        start = time.perf_counter()
+        try:
+            return method(query, params)
+        except Exception:
+            call.errors += 1
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            if elapsed * 1000 >= SLOW_QUERY_MS:
+                _slow_query(call.name, query, elapsed)
+
+    def execute(self, query, params=()):
+        result = self._timed(self._cursor.execute, query, params)
+        # Writes count the rows they touched; reads count rows as fetched.
+        if self._cursor.description is None and self._cursor.rowcount > 0:
+            self._call.rows += self._cursor.rowcount
+        return result
+
+    def executemany(self, query, seq_of_params):
+        result = self._timed(self._cursor.executemany, query, seq_of_params)
+        if self._cursor.rowcount > 0:
+            self._call.rows += self._cursor.rowcount
+        return result
+
+    def fetchone(self):
+        row = self._cursor.fetchone()
+        if row is not None:
+            self._call.rows += 1
+        return row
+
+    def fetchall(self):
+        rows = self._cursor.fetchall()
+        self._call.rows += len(rows)
+        return rows
+
+
+def _slow_query(name, query, seconds):
+    statement = " ".join(query.split())
+    with _lock:
+        _slow_queries.append({"operation": name, "ms": seconds * 1000, "query": statement,
+                              "at": time.strftime("%Y-%m-%d %H:%M:%S")})
+    print(f"Slow query in {name}: {seconds * 1000:.1f} ms: {statement}")
+
+
+def add_listener(listener):
+    """Call listener(call) after every operation; call has name, seconds, rows, queries, acquire_seconds and errors."""
+    _listeners.append(listener)
+
+
+def remove_listener(listener):
+    _listeners.remove(listener)
+
+
+def snapshot():
+    """Per-operation totals and latency percentiles (ms) so far, plus the recent slow queries."""
+    with _lock:
+        operations = {
+            name: {
+                "count": stats.count,
+                "errors": stats.errors,
+                "rows": stats.rows,
+                "queries": stats.queries,
+                "mean_ms": stats.seconds * 1000 / stats.count,
+                "p50_ms": stats.percentile(0.50) * 1000,
+                "p95_ms": stats.percentile(0.95) * 1000,
+                "p99_ms": stats.percentile(0.99) * 1000,
+                "max_ms": stats.max_seconds * 1000,
+                "acquire_mean_ms": stats.acquire_seconds * 1000 / stats.count,
+            }
+            for name, stats in _stats.items()
+        }
+        return {"operations": operations, "slow_queries": list(_slow_queries)}
+
+
+def reset():
+    with _lock:
+        _stats.clear()
+        _slow_queries.clear()
+
+
+def prometheus_text():
+    lines = [
+        "# HELP saku_db_operation_seconds Time spent in database.py operations.",
+        "# TYPE saku_db_operation_seconds histogram",
+    ]
+    counters = {
+        "saku_db_errors_total": ("Failed queries and connection attempts.", "errors"),
+        "saku_db_rows_total": ("Rows returned or written.", "rows"),
+        "saku_db_queries_total": ("Statements executed.", "queries"),
+        "saku_db_acquire_seconds_total": ("Time spent waiting for a pooled connection.", "acquire_seconds"),
+    }
+    with _lock:
+        items = sorted(_stats.items())
+        for name, stats in items:
+            cumulative = 0
+            for bound, in_bucket in zip(BUCKETS + ("+Inf",), stats.buckets):
+                cumulative += in_bucket
+                lines.append(f'saku_db_operation_seconds_bucket{{operation="{name}",le="{bound}"}} {cumulative}')
+            lines.append(f'saku_db_operation_seconds_sum{{operation="{name}"}} {stats.seconds}')
+            lines.append(f'saku_db_operation_seconds_count{{operation="{name}"}} {stats.count}')
+        for metric, (help_text, field) in counters.items():
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} counter")
+            for name, stats in items:
+                lines.append(f'{metric}{{operation="{name}"}} {getattr(stats, field)}')
+    return "\n".join(lines) + "\n"
+
+
+def write_prometheus(path=None):
+    """Write prometheus_text() to path (default METRICS_PATH) in one rename, so readers never see half a file."""
+    path = path or METRICS_PATH
+    if not path:
+        return False
+    try:
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            f.write(prometheus_text())
+        os.replace(path + ".tmp", path)
+        return True
+    except OSError as e:
+        print(f"Could not write metrics: {e}")
+        return False
+
+
+def start_dump(path=None, interval=METRICS_INTERVAL):
+    """Rewrite the dump file every interval seconds on a daemon thread; no-op without a path."""
+    global _dump_thread
+    path = path or METRICS_PATH
+    if not path or _dump_thread is not None:
+        return
+
+    def dump():
+        while True:
+            time.sleep(interval)
+            write_prometheus(path)
+
+    _dump_thread = threading.Thread(target=dump, name="metrics-dump", daemon=True)
+    _dump_thread.start()
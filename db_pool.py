@@ -0,0 +1,94 @@
+import queue
+import threading
+import time
+
+POOL_SIZE = 5
+HEALTH_CHECK_INTERVAL = 30.0
+ACQUIRE_TIMEOUT = 10.0
+
+
+class PoolTimeout(Exception):
+    pass
+
+
+class PooledConnection:
+    """Wraps a raw connection so that close() hands it back to the pool."""
+
+    def __init__(self, pool, conn):
+        self._pool = pool
+        self._conn = conn
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def close(self):
+        if self._conn is not None:
+            self._pool.release(self._conn)
+            self._conn = None
+
+    def discard(self):
+        if self._conn is not None:
+            self._pool.release(self._conn, discard=True)
+            self._conn = None
+
+
+class ConnectionPool:
+    def __init__(self, connect, size=POOL_SIZE, is_alive=None,
+                 health_check_interval=HEALTH_CHECK_INTERVAL, timeout=ACQUIRE_TIMEOUT):
+        self.size = size
+        self.health_check_interval = health_check_interval
+        self.timeout = timeout
+        self._connect = connect
+        self._is_alive = is_alive
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+
+    def acquire(self):
+        if not self._slots.acquire(timeout=self.timeout):
+            raise PoolTimeout(f"No free connection after {self.timeout}s")
+        try:
+            return PooledConnection(self, self._checkout())
+        except Exception:
+            self._slots.release()
+            raise
+
+    def _checkout(self):
+        try:
+            conn, last_used = self._idle.get_nowait()
+        except queue.Empty:
+            return self._connect()
+
+        # Only ping connections that sat idle long enough to have gone stale,
+        # so hot connections cost no extra round-trip.
+        idle_for = time.monotonic() - last_used
+        if self._is_alive and idle_for > self.health_check_interval and not self._is_alive(conn):
+            self._close_quietly(conn)
+            return self._connect()
+        return conn
+
+    def release(self, conn, discard=False):
+        try:
+            if not discard and getattr(conn, "in_transaction", False):
+                conn.rollback()
+        except Exception:
+            discard = True
+
+        if discard:
+            self._close_quietly(conn)
+        else:
+            self._idle.put((conn, time.monotonic()))
+        self._slots.release()
+
+    def close_all(self):
+        while True:
+            try:
+                conn, _ = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            self._close_quietly(conn)
+
+    def _close_quietly(self, conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
@@ -1,24 +1,190 @@
 import sys
-from PySide6.QtWidgets import QApplication
-from auth_form import LoginWindow
-from saku import MainWindow
+import time
+
+PROFILE_FLAG = "--profile-startup"
+WATCHDOG_FLAG = "--watchdog"
+RETIRE_POLL_MS = 100
+
+
+class StartupProfile:
+    """Wall-clock phases of startup, printed to stderr with --profile-startup."""
+
+    def __init__(self, enabled):
+        self.enabled = enabled
+        self.start = self.last = time.perf_counter()
+        self.marks = []
+
+    def mark(self, label):
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        self.marks.append((label, now - self.last, now - self.start))
+        self.last = now
+
+    def report(self):
+        if not self.enabled or not self.marks:
+            return
+        print(f"{'startup phase':<34} {'took ms':>9} {'at ms':>9}", file=sys.stderr)
+        for label, took, at in self.marks:
+            print(f"{label:<34} {took * 1000:9.1f} {at * 1000:9.1f}", file=sys.stderr)
+        self.marks = []
+
+
+def after_first_paint(widget, callback):
+    """Call callback once widget has finished its first paint."""
+    from PySide6.QtCore import QObject, QEvent, QTimer
+
+    class PaintWatcher(QObject):
+        def eventFilter(self, obj, event):
+            if event.type() == QEvent.Paint:
+                widget.removeEventFilter(self)
+                # Runs on the next loop pass, after this paint has completed.
+                QTimer.singleShot(0, callback)
+            return False
+
+    watcher = PaintWatcher(widget)
+    widget.installEventFilter(watcher)
+
 
 def main():
+    profile = StartupProfile(PROFILE_FLAG in sys.argv)
+    if profile.enabled:
+        sys.argv.remove(PROFILE_FLAG)
+    use_watchdog = WATCHDOG_FLAG in sys.argv
+    if use_watchdog:
+        sys.argv.remove(WATCHDOG_FLAG)
+
+    from PySide6.QtCore import QTimer
+    from PySide6.QtWidgets import QApplication
+    profile.mark("import PySide6")
+    # saku (and everything only MainWindow needs) is imported after the login
+    # window is up, so it doesn't sit in front of the first paint.
+    from auth_form import LoginWindow
+    from auth import load_session_token, resume_session
+    from database import init_db, close_db
+    import db_async
+    import db_metrics
+    import themes
+    profile.mark("import auth_form, database")
+
     app = QApplication(sys.argv)
-    
-    login_window = LoginWindow()
+    db_ready = db_async.submit(init_db)
+    # Only if SAKU_METRICS_PATH asks for a dump file.
+    db_metrics.start_dump()
+    profile.mark("QApplication")
+
+    watchdog = None
+    if use_watchdog:
+        from ui_watchdog import EventLoopWatchdog
+        watchdog = EventLoopWatchdog()
+        watchdog.start()
+
+    login_window = None
     main_window = None
-    
-    def handle_login(user_id):
-        login_window.close()
+
+    def prepare_main_window():
+        # Widgets can only be built on the GUI thread, so this runs as soon as
+        # the loop is idle after the login window's first paint, while the
+        # user is still typing.
         nonlocal main_window
-        main_window = MainWindow(user_id)
+        if main_window is not None:
+            return
+        from saku import MainWindow
+        profile.mark("import saku")
+        main_window = MainWindow()
+        main_window.logout_callback = handle_logout
+        profile.mark("build MainWindow")
+
+    def login_shown():
+        profile.mark("LoginWindow first paint")
+        # The login window has decoded theme0; the other backgrounds decode
+        # while the user signs in, so the first theme switch is instant too.
+        themes.preload(login_window.size())
+        QTimer.singleShot(0, prepare_main_window)
+
+    def show_login():
+        # Built only when needed: a remembered session never shows it.
+        nonlocal login_window
+        login_window = LoginWindow()
+        profile.mark("build LoginWindow")
+        login_window.success_callback = handle_login
+        login_window.accepted_callback = user_accepted
+        after_first_paint(login_window, login_shown)
+        login_window.show()
+        profile.mark("LoginWindow.show()")
+
+    def check_session(db_ok):
+        if not db_ok:
+            show_login()
+            return
+        db_async.submit(resume_session, token).then(session_checked, lambda error: show_login())
+
+    def session_checked(user_id):
+        profile.mark("session lookup")
+        if user_id:
+            handle_login(user_id)
+        else:
+            show_login()
+
+    def user_accepted(user_id, first_page):
+        # The second that "Login successful!" stays up is spent loading the
+        # user's tasks into the still hidden main window, so it opens full.
+        profile.mark("credentials accepted")
+        prepare_main_window()
+        if main_window.user_id != user_id:
+            main_window.set_user(user_id, first_page)
+
+    def handle_login(user_id):
+        if login_window is not None:
+            login_window.close()
+        profile.mark("login")
+        prepare_main_window()
+        if main_window.user_id != user_id:
+            main_window.set_user(user_id)
         main_window.show()
-    
-    login_window.success_callback = handle_login
-    login_window.show()
-    
-    sys.exit(app.exec())
+        profile.mark("MainWindow.show()")
+        after_first_paint(main_window, main_shown)
+
+    def handle_logout():
+        # The next user gets a fresh window, built while they type as at
+        # startup.
+        nonlocal main_window
+        window, main_window = main_window, None
+        show_login()
+        window.close()
+        retire_window(window, db_async.pending_calls())
+
+    def retire_window(window, calls):
+        # Results still on their way call back into the old window, so it is
+        # only deleted once they have all been delivered.
+        calls = [call for call in calls if call.pending]
+        if calls:
+            QTimer.singleShot(RETIRE_POLL_MS, lambda: retire_window(window, calls))
+        else:
+            window.deleteLater()
+
+    def main_shown():
+        profile.mark("MainWindow first paint")
+        profile.report()
+
+    token = load_session_token()
+    if token is None:
+        show_login()
+    else:
+        # One indexed lookup instead of a password check; the session query
+        # has to wait for init_db to open the pool.
+        db_ready.then(check_session, lambda error: show_login())
+
+    exit_code = app.exec()
+    profile.report()
+    if watchdog is not None:
+        watchdog.stop()
+        print(watchdog.summary(), file=sys.stderr)
+    db_async.shutdown()
+    themes.shutdown()
+    close_db()
+    db_metrics.write_prometheus()
+    sys.exit(exit_code)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,312 @@
+"""Versioned schema migrations, applied in order and recorded in schema_migrations.
+
+    python migrations.py            # apply pending migrations
+    python migrations.py --status   # show the current version
+"""
+import sys
+
+
+# MySQL commits each DDL statement on its own, and so does Python's sqlite3
+# module, so a version that fails halfway can't be rolled back. Steps that
+# can't say IF NOT EXISTS are (guard, statement) pairs instead: the statement
+# is skipped when the guard query finds it already done, which makes the
+# whole version safe to re-run.
+def _has_column(table, column):
+    return ("SELECT 1 FROM information_schema.columns "
+            "WHERE table_schema = DATABASE() AND table_name = %s AND column_name = %s", (table, column))
+
+
+def _sqlite_has_column(table, column):
+    return ("SELECT 1 FROM pragma_table_info(%s) WHERE name = %s", (table, column))
+
+
+def _has_index(table, index):
+    return ("SELECT 1 FROM information_schema.statistics "
+            "WHERE table_schema = DATABASE() AND table_name = %s AND index_name = %s", (table, index))
+
+
+def _has_trigger(trigger):
+    return ("SELECT 1 FROM information_schema.triggers "
+            "WHERE trigger_schema = DATABASE() AND trigger_name = %s", (trigger,))
+
+
+# (version, description, statements per backend)
+MIGRATIONS = [
+    (1, "users and tasks tables", {
+        "mysql": [
+            '''
+            CREATE TABLE IF NOT EXISTS users (
+                user_id INT AUTO_INCREMENT PRIMARY KEY,
+                username VARCHAR(255) NOT NULL UNIQUE,
+                password VARCHAR(255) NOT NULL
+            )
+            ''',
+            '''
+            CREATE TABLE IF NOT EXISTS tasks (
+                task_id INT AUTO_INCREMENT PRIMARY KEY,
+                user_id INT NOT NULL,
+                task_text TEXT NOT NULL,
+                due_date DATE,
+                is_completed BOOLEAN DEFAULT FALSE,
+                FOREIGN KEY (user_id) REFERENCES users(user_id)
+            )
+            ''',
+        ],
+        "sqlite": [
+            '''
+            CREATE TABLE IF NOT EXISTS users (
+                user_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                username TEXT NOT NULL UNIQUE,
+                password TEXT NOT NULL
+            )
+            ''',
+            '''
+            CREATE TABLE IF NOT EXISTS tasks (
+                task_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                user_id INTEGER NOT NULL,
+                task_text TEXT NOT NULL,
+                due_date DATE,
+                is_completed BOOLEAN DEFAULT 0,
+                FOREIGN KEY (user_id) REFERENCES users(user_id)
+            )
+            ''',
+        ],
+    }),
+    # Every task query filters on user_id. (user_id, task_id) serves the
+    # keyset pages and "latest task" lookups; the other two serve due-date
+    # ordering and completed/pending counts.
+    (2, "composite task indexes", {
+        "mysql": [
+            (_has_index("tasks", "idx_tasks_user_task"),
+             "CREATE INDEX idx_tasks_user_task ON tasks (user_id, task_id)"),
+            (_has_index("tasks", "idx_tasks_user_due"),
+             "CREATE INDEX idx_tasks_user_due ON tasks (user_id, due_date)"),
+            (_has_index("tasks", "idx_tasks_user_completed"),
+             "CREATE INDEX idx_tasks_user_completed ON tasks (user_id, is_completed)"),
+        ],
+        "sqlite": [
+            "CREATE INDEX IF NOT EXISTS idx_tasks_user_task ON tasks (user_id, task_id)",
+            "CREATE INDEX IF NOT EXISTS idx_tasks_user_due ON tasks (user_id, due_date)",
+            "CREATE INDEX IF NOT EXISTS idx_tasks_user_completed ON tasks (user_id, is_completed)",
+        ],
+    }),
+    # Change tracking for the local task cache: updated_at moves whenever a
+    # row's values change and deletes leave a tombstone, so a client can ask
+    # for just what changed since its last sync (database.get_task_changes).
+    (3, "task change tracking", {
+        "mysql": [
+            (_has_column("tasks", "updated_at"),
+             "ALTER TABLE tasks ADD COLUMN updated_at TIMESTAMP(6) NOT NULL "
+             "DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6)"),
+            (_has_index("tasks", "idx_tasks_user_updated"),
+             "CREATE INDEX idx_tasks_user_updated ON tasks (user_id, updated_at)"),
+            '''
+            CREATE TABLE IF NOT EXISTS task_tombstones (
+                task_id INT PRIMARY KEY,
+                user_id INT NOT NULL,
+                deleted_at TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6),
+                INDEX idx_tombstones_user_deleted (user_id, deleted_at)
+            )
+            ''',
+            (_has_trigger("tasks_tombstone"), '''
+            CREATE TRIGGER tasks_tombstone AFTER DELETE ON tasks FOR EACH ROW
+                INSERT INTO task_tombstones (task_id, user_id) VALUES (OLD.task_id, OLD.user_id)
+            '''),
+        ],
+        # SQLite can't ADD COLUMN with a CURRENT_TIMESTAMP default or ON
+        # UPDATE, so triggers stamp the rows instead.
+        "sqlite": [
+            (_sqlite_has_column("tasks", "updated_at"),
+             "ALTER TABLE tasks ADD COLUMN updated_at TEXT"),
+            "UPDATE tasks SET updated_at = strftime('%Y-%m-%d %H:%M:%f', 'now')",
+            "CREATE INDEX IF NOT EXISTS idx_tasks_user_updated ON tasks (user_id, updated_at)",
+            '''
+            CREATE TRIGGER IF NOT EXISTS tasks_stamp_insert AFTER INSERT ON tasks FOR EACH ROW
+            BEGIN
+                UPDATE tasks SET updated_at = strftime('%Y-%m-%d %H:%M:%f', 'now')
+                WHERE task_id = NEW.task_id;
+            END
+            ''',
+            '''
+            CREATE TRIGGER IF NOT EXISTS tasks_stamp_update
+            AFTER UPDATE OF task_text, due_date, is_completed ON tasks FOR EACH ROW
+            WHEN NEW.task_text IS NOT OLD.task_text
+                OR NEW.due_date IS NOT OLD.due_date
+                OR NEW.is_completed IS NOT OLD.is_completed
+            BEGIN
+                UPDATE tasks SET updated_at = strftime('%Y-%m-%d %H:%M:%f', 'now')
+                WHERE task_id = NEW.task_id;
+            END
+            ''',
+            '''
+            CREATE TABLE IF NOT EXISTS task_tombstones (
+                task_id INTEGER PRIMARY KEY,
+                user_id INTEGER NOT NULL,
+                deleted_at TEXT NOT NULL DEFAULT (strftime('%Y-%m-%d %H:%M:%f', 'now'))
+            )
+            ''',
+            "CREATE INDEX IF NOT EXISTS idx_tombstones_user_deleted ON task_tombstones (user_id, deleted_at)",
+            '''
+            CREATE TRIGGER IF NOT EXISTS tasks_tombstone AFTER DELETE ON tasks FOR EACH ROW
+            BEGIN
+                INSERT OR REPLACE INTO task_tombstones (task_id, user_id) VALUES (OLD.task_id, OLD.user_id);
+            END
+            ''',
+        ],
+    }),
+    # Tasks created offline carry the client's id for them, so replaying the
+    # task journal after a failed or interrupted sync can't insert twice.
+    (4, "task client_ref", {
+        "mysql": [
+            (_has_column("tasks", "client_ref"),
+             "ALTER TABLE tasks ADD COLUMN client_ref VARCHAR(36) NULL"),
+            (_has_index("tasks", "idx_tasks_client_ref"),
+             "CREATE UNIQUE INDEX idx_tasks_client_ref ON tasks (client_ref)"),
+        ],
+        "sqlite": [
+            (_sqlite_has_column("tasks", "client_ref"),
+             "ALTER TABLE tasks ADD COLUMN client_ref TEXT"),
+            "CREATE UNIQUE INDEX IF NOT EXISTS idx_tasks_client_ref ON tasks (client_ref)",
+        ],
+    }),
+    # "Remember me" logins. Only a SHA-256 of each token is stored; the
+    # primary key makes resuming a session a single index lookup.
+    (5, "sessions", {
+        "mysql": [
+            '''
+            CREATE TABLE IF NOT EXISTS sessions (
+                token_hash CHAR(64) PRIMARY KEY,
+                user_id INT NOT NULL,
+                expires_at DATETIME NOT NULL,
+                INDEX idx_sessions_expires (expires_at),
+                FOREIGN KEY (user_id) REFERENCES users(user_id) ON DELETE CASCADE
+            )
+            ''',
+        ],
+        "sqlite": [
+            '''
+            CREATE TABLE IF NOT EXISTS sessions (
+                token_hash TEXT PRIMARY KEY,
+                user_id INTEGER NOT NULL,
+                expires_at TEXT NOT NULL,
+                FOREIGN KEY (user_id) REFERENCES users(user_id) ON DELETE CASCADE
+            )
+            ''',
+            "CREATE INDEX IF NOT EXISTS idx_sessions_expires ON sessions (expires_at)",
+        ],
+    }),
+    # Task search (database.query_tasks). The composite index serves the
+    # default "pending, soonest due first" listing without a sort; the text
+    # index lets a search match words instead of scanning every task_text.
+    (6, "task search indexes", {
+        "mysql": [
+            (_has_index("tasks", "idx_tasks_user_completed_due"),
+             "CREATE INDEX idx_tasks_user_completed_due ON tasks (user_id, is_completed, due_date)"),
+            (_has_index("tasks", "ft_tasks_text"),
+             "CREATE FULLTEXT INDEX ft_tasks_text ON tasks (task_text)"),
+        ],
+        # An external-content FTS5 table: it indexes tasks.task_text without
+        # storing a second copy, and triggers keep it in step.
+        "sqlite": [
+            "CREATE INDEX IF NOT EXISTS idx_tasks_user_completed_due ON tasks (user_id, is_completed, due_date)",
+            "CREATE VIRTUAL TABLE IF NOT EXISTS tasks_fts USING fts5(task_text, content='tasks', content_rowid='task_id')",
+            "INSERT INTO tasks_fts (tasks_fts) VALUES ('rebuild')",
+            '''
+            CREATE TRIGGER IF NOT EXISTS tasks_fts_insert AFTER INSERT ON tasks FOR EACH ROW
+            BEGIN
+                INSERT INTO tasks_fts (rowid, task_text) VALUES (NEW.task_id, NEW.task_text);
+            END
+            ''',
+            '''
+            CREATE TRIGGER IF NOT EXISTS tasks_fts_delete AFTER DELETE ON tasks FOR EACH ROW
+            BEGIN
+                INSERT INTO tasks_fts (tasks_fts, rowid, task_text) VALUES ('delete', OLD.task_id, OLD.task_text);
+            END
+            ''',
+            '''
+            CREATE TRIGGER IF NOT EXISTS tasks_fts_update AFTER UPDATE OF task_text ON tasks FOR EACH ROW
+            BEGIN
+                INSERT INTO tasks_fts (tasks_fts, rowid, task_text) VALUES ('delete', OLD.task_id, OLD.task_text);
+                INSERT INTO tasks_fts (rowid, task_text) VALUES (NEW.task_id, NEW.task_text);
+            END
+            ''',
+        ],
+    }),
+    # A server that resets AUTO_INCREMENT on restart can hand out a deleted
+    # task_id again; deleting it a second time must refresh its tombstone
+    # rather than fail the DELETE. The deleted_at index serves pruning
+    # (database.TOMBSTONE_DAYS).
+    (7, "tombstone upsert and pruning", {
+        "mysql": [
+            "DROP TRIGGER IF EXISTS tasks_tombstone",
+            '''
+            CREATE TRIGGER tasks_tombstone AFTER DELETE ON tasks FOR EACH ROW
+                INSERT INTO task_tombstones (task_id, user_id) VALUES (OLD.task_id, OLD.user_id)
+                ON DUPLICATE KEY UPDATE user_id = OLD.user_id, deleted_at = CURRENT_TIMESTAMP(6)
+            ''',
+            (_has_index("task_tombstones", "idx_tombstones_deleted"),
+             "CREATE INDEX idx_tombstones_deleted ON task_tombstones (deleted_at)"),
+        ],
+        "sqlite": [
+            "CREATE INDEX IF NOT EXISTS idx_tombstones_deleted ON task_tombstones (deleted_at)",
+        ],
+    }),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def current_version(conn):
+    cursor = conn.cursor()
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INT PRIMARY KEY,
+            description VARCHAR(255) NOT NULL
+        )
+    ''')
+    cursor.execute("SELECT MAX(version) FROM schema_migrations")
+    row = cursor.fetchone()
+    conn.commit()
+    return row[0] or 0
+
+
+def migrate(conn, dialect, target=LATEST_VERSION):
+    """Apply every migration above the recorded version up to target; returns the versions applied."""
+    version = current_version(conn)
+    applied = []
+    cursor = conn.cursor()
+    for number, description, statements in MIGRATIONS:
+        if number <= version or number > target:
+            continue
+        for step in statements[dialect]:
+            guard, statement = step if isinstance(step, tuple) else (None, step)
+            if guard is not None:
+                cursor.execute(*guard)
+                if cursor.fetchall():
+                    continue
+            cursor.execute(statement)
+        cursor.execute(
+            "INSERT INTO schema_migrations (version, description) VALUES (%s, %s)",
+            (number, description)
+        )
+        conn.commit()
+        applied.append(number)
+    return applied
+
+
+def main():
+    import database
+    backend = database.get_backend()
+    conn = backend.connect()
+    try:
+        if "--status" in sys.argv:
+            print(f"{backend.name}: schema version {current_version(conn)} (latest {LATEST_VERSION})")
+            return
+        applied = migrate(conn, backend.name)
+        print(f"{backend.name}: applied {applied or 'nothing'}, now at version {current_version(conn)}")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
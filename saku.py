@@ -1,39 +1,53 @@
 from PySide6.QtWidgets import (
-    QMainWindow, QWidget, QVBoxLayout, QPushButton,
-    QLineEdit, QHBoxLayout, QProgressBar, QCheckBox, QScrollArea, QLabel, QDateEdit
+    QApplication, QMainWindow, QWidget, QVBoxLayout, QPushButton,
+    QLineEdit, QHBoxLayout, QProgressBar, QLabel, QDateEdit, QListView, QAbstractItemView, QComboBox,
+    QSystemTrayIcon
 )
-from PySide6.QtCore import Qt, QUrl, QTimer, QTime, QDate
-from PySide6.QtGui import QIcon, QPixmap 
-from PySide6.QtMultimedia import QMediaPlayer, QAudioOutput
-from database import save_task, update_task_details, delete_task, get_user_tasks
+from PySide6.QtCore import Qt, QUrl, QTimer, QTime, QDate, QBuffer, QByteArray, QIODevice
+from PySide6.QtGui import QIcon, QPixmap, QPainter
+from database import TASK_PAGE_SIZE
+from write_behind import TaskWriteQueue
+from task_model import TaskListModel, TaskDelegate
+from task_service import TaskService, progress_percent
+from task_sync import TaskSync
+from auth import forget_session
+from urgency_scheduler import UrgencyScheduler
+import ticker
+from styles import MAIN_WINDOW_STYLE
+import themes
+import db_async
+import uuid
 from datetime import datetime
 
 WINDOW_WIDTH = 736
 WINDOW_HEIGHT = 413
 ICON_PATH = "saku.jpg"
 DEFAULT_THEME = "theme0"
+SEARCH_DEBOUNCE_MS = 250
+SEARCH_FILTERS = ("All", "Pending", "Completed", "Overdue", "Due this week")
+SEARCH_SORTS = (("Oldest first", "created"), ("Newest first", "newest"), ("Due date", "due"))
+REMINDER_TITLES = 5
+
+def edit_rows(edits):
+    """Task rows by task_id for TaskWriteQueue's {key: (text, due_date, is_completed)} edits."""
+    # Tasks keyed by client_ref aren't on the server, so never in its rows.
+    return {key: {"task_id": key, "task_text": task_text, "due_date": due_date, "is_completed": is_completed}
+            for key, (task_text, due_date, is_completed) in edits.items() if not isinstance(key, str)}
+
 
 class ClockWidget(QWidget):
     def __init__(self):
         super().__init__()
         self.layout = QVBoxLayout()
         
+        self.setObjectName("clockWidget")
         self.clock_label = QLabel()
+        self.clock_label.setObjectName("clockLabel")
         self.clock_label.setAlignment(Qt.AlignCenter)
         self.update_clock()
         
-        self.clock_label.setStyleSheet("""
-            QLabel {
-                font-size: 24px;
-                font-weight: bold;
-                color: #5A7EC9;
-                text-align: center;
-            }
-        """)
-        
-        self.clock_timer = QTimer()
-        self.clock_timer.timeout.connect(self.update_clock)
-        self.clock_timer.start(1000)
+        # Paused while the window is hidden or minimized.
+        self.clock_tick = ticker.subscribe(self.update_clock, 1, widget=self)
         
         self.layout.addWidget(self.clock_label)
         self.setLayout(self.layout)
@@ -43,28 +57,59 @@ class ClockWidget(QWidget):
         self.clock_label.setText(current_time)
 
 class MainWindow(QMainWindow):
-    def __init__(self, user_id):
+    def __init__(self, user_id=None):
         super().__init__()
-        self.user_id = user_id
+        self.user_id = None
+        self.service = None
+        self.first_page = None
+        self.load_generation = 0
+        # Task updates in the journal but not replayed to the server yet, by
+        # task_id.
+        self.journaled_edits = {}
+        # Tasks deleted here whose delete hasn't been replayed yet.
+        self.deleted_ids = set()
+        self.logout_callback = lambda: None
         
         self.setWindowTitle("SakuDo")
         self.setGeometry(400, 200, WINDOW_WIDTH, WINDOW_HEIGHT)
         self.setFixedSize(WINDOW_WIDTH, WINDOW_HEIGHT)
         self.setWindowIcon(QIcon(ICON_PATH))
 
-        self.media_player = QMediaPlayer()
-        self.audio_output = QAudioOutput()
-        self.media_player.setAudioOutput(self.audio_output)
-        self.media_player.setSource(QUrl.fromLocalFile("m0.mp3"))
+        # Music is off by default, so the multimedia backend isn't started
+        # until the first toggle_music(); the tracks are read ahead meanwhile.
+        self.media_player = None
+        self.audio_output = None
+        self.music_buffer = None
+        self.music_file = None
         self.music_playing = False
-        self.media_player.mediaStatusChanged.connect(self.loop_music)
+        themes.preload_tracks()
+
+        # Every task write goes to the local journal first and reaches the
+        # server through task_sync, so nothing waits on or is lost to it.
+        self.task_sync = TaskSync(self)
+        self.task_sync.task_added.connect(self.task_synced)
+        self.task_sync.online_changed.connect(self.sync_state_changed)
+        self.task_sync.synced.connect(self.edits_synced)
+        self.write_queue = TaskWriteQueue(write=self.journal_updates, local=True, parent=self)
+        self.write_queue.written.connect(self.edits_journaled)
+        QApplication.instance().aboutToQuit.connect(self.write_queue.flush)
 
         self.central_widget = QWidget()
+        self.central_widget.setStyleSheet(MAIN_WINDOW_STYLE)
         self.setCentralWidget(self.central_widget)
         self.main_layout = QHBoxLayout(self.central_widget)
 
         self.init_ui()
         self.apply_theme(DEFAULT_THEME)
+        if user_id is not None:
+            self.set_user(user_id)
+
+    def set_user(self, user_id, first_page=None):
+        # main.py builds the window before login and hands the user over here,
+        # with the first page of tasks when the login query brought it along.
+        self.user_id = user_id
+        self.service = TaskService(user_id)
+        self.first_page = first_page
         self.load_user_tasks()
 
     def init_ui(self):
@@ -73,11 +118,12 @@ class MainWindow(QMainWindow):
 
     def init_left_section(self):
         self.left_section = QWidget()
-        self.left_section.setStyleSheet("background: transparent;")
+        self.left_section.setObjectName("leftSection")
         self.left_layout = QVBoxLayout(self.left_section)
 
         self.init_theme_buttons()
         self.init_task_input()
+        self.init_search_bar()
         self.init_task_list()
         self.init_progress_bar()
 
@@ -89,7 +135,7 @@ class MainWindow(QMainWindow):
 
         for i in range(4):
             btn = QPushButton(str(i), self)
-            btn.setStyleSheet(self.button_style())
+            btn.setObjectName("themeButton")
             btn.clicked.connect(lambda _, theme=f"theme{i}": self.apply_theme(theme))
             layout.addWidget(btn)
 
@@ -97,36 +143,12 @@ class MainWindow(QMainWindow):
 
     def init_task_input(self):
         self.task_input = QLineEdit(self)
+        self.task_input.setObjectName("taskInput")
         self.task_input.setPlaceholderText("Enter a new task")
-        self.task_input.setStyleSheet("""
-        QLineEdit {
-            background-color: white;
-            border-radius: 5px;
-            min-width: 200px;
-            padding: 5px;
-            border: 2px solid #5A7EC9;
-        }
-    """)
 
         self.date_input = QDateEdit()
         self.date_input.setCalendarPopup(True)
         self.date_input.setDate(QDate.currentDate())
-        
-        self.date_input.setStyleSheet("""
-        QDateEdit {
-            background-color: white;
-            border: 1px solid #5A7EC9;
-            border-radius: 5px;
-            padding: 2px;
-            min-width: 90px;
-            max-width: 100px;
-            font-size: 12px;
-        }
-        QDateEdit::drop-down {
-            width: 16px;
-        }
-    """)
-        self.date_input.setStyleSheet(self.date_input_style())
         self.date_input.setFixedHeight(28)  # Match height with tas
         
         
@@ -135,138 +157,162 @@ class MainWindow(QMainWindow):
         input_layout.addWidget(self.date_input)
 
         self.add_task_button = QPushButton("Add task", self)
-        self.add_task_button.setStyleSheet(self.add_button_style())
+        self.add_task_button.setObjectName("addTaskButton")
         self.add_task_button.clicked.connect(self.add_task_from_input)
 
         self.left_layout.addLayout(input_layout)
         self.left_layout.addWidget(self.add_task_button)
 
-    def init_task_list(self):
-        self.scroll_area = QScrollArea(self)
-        self.scroll_area.setWidgetResizable(True)
-        self.scroll_area.setStyleSheet("background: transparent; border: none;")
-
-        self.scroll_widget = QWidget()
-        self.scroll_widget.setStyleSheet("background: transparent;")
-        self.scroll_layout = QVBoxLayout(self.scroll_widget)
-        self.scroll_layout.setAlignment(Qt.AlignTop)
-        self.scroll_layout.setSpacing(10)
+    def init_search_bar(self):
+        self.search_input = QLineEdit(self)
+        self.search_input.setObjectName("searchInput")
+        self.search_input.setPlaceholderText("Search tasks")
+        self.search_input.setClearButtonEnabled(True)
+
+        self.search_filter = QComboBox(self)
+        self.search_filter.addItems(SEARCH_FILTERS)
+        self.search_sort = QComboBox(self)
+        for label, sort in SEARCH_SORTS:
+            self.search_sort.addItem(label, sort)
+
+        # Typing restarts the timer, so one query goes out per pause rather
+        # than one per keystroke; the combo boxes search straight away.
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(SEARCH_DEBOUNCE_MS)
+        self.search_timer.timeout.connect(self.run_search)
+        self.search_input.textChanged.connect(self.search_timer.start)
+        self.search_filter.currentIndexChanged.connect(self.run_search)
+        self.search_sort.currentIndexChanged.connect(self.run_search)
+        self.search_args = None
+        self.search_after = None
+        self.search_generation = 0
+
+        search_layout = QHBoxLayout()
+        search_layout.addWidget(self.search_input)
+        search_layout.addWidget(self.search_filter)
+        search_layout.addWidget(self.search_sort)
+        self.left_layout.addLayout(search_layout)
 
-        self.scroll_area.setWidget(self.scroll_widget)
-        self.left_layout.addWidget(self.scroll_area)
+    def init_task_list(self):
+        self.task_model = TaskListModel(self)
+        self.task_model.task_edited.connect(self.task_edited)
+        self.task_model.more_requested.connect(self.fetch_task_page)
+        self.task_model.counts_changed.connect(self.update_progress)
+        # Nothing to page until set_user() gives the window a TaskService.
+        self.task_model.loading = True
+
+        # Search results are a second model paged from query_tasks; the full
+        # list (cache, journal, deltas) is left as it is underneath.
+        self.search_model = TaskListModel(self)
+        self.search_model.task_edited.connect(self.task_edited)
+        self.search_model.more_requested.connect(self.fetch_search_page)
+
+        # Row colours follow the date; these repaint a row only when its
+        # urgency actually changes (see urgency_scheduler).
+        self.urgency = UrgencyScheduler(self.task_model, reminders=True, parent=self)
+        self.urgency.reminders_due.connect(self.show_reminders)
+        self.search_urgency = UrgencyScheduler(self.search_model, parent=self)
+        self.tray_icon = None
+
+        self.task_delegate = TaskDelegate(self)
+        self.task_delegate.delete_requested.connect(self.delete_task)
+
+        # Rows are painted by the delegate; only the one being edited gets a
+        # real widget, so cost follows the viewport rather than the task count.
+        self.task_list = QListView(self)
+        self.task_list.setObjectName("taskList")
+        self.task_list.setModel(self.task_model)
+        self.task_list.setItemDelegate(self.task_delegate)
+        self.task_list.setUniformItemSizes(True)
+        self.task_list.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.task_list.setVerticalScrollMode(QAbstractItemView.ScrollPerPixel)
+        self.task_list.setSelectionMode(QAbstractItemView.NoSelection)
+        self.task_list.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
+        self.left_layout.addWidget(self.task_list)
 
     def init_progress_bar(self):
         self.progress_bar = QProgressBar(self)
-        self.progress_bar.setStyleSheet(self.progress_bar_style())
         self.progress_bar.setValue(0)
         self.left_layout.addWidget(self.progress_bar)
 
     def init_right_section(self):
         self.right_section = QWidget()
-        self.right_section.setStyleSheet("background: transparent;")
+        self.right_section.setObjectName("rightSection")
         self.right_layout = QVBoxLayout(self.right_section)
 
         self.clock_widget = ClockWidget()
         self.clock_widget.setFixedSize(150, 50)
         self.right_layout.addWidget(self.clock_widget, alignment=Qt.AlignTop | Qt.AlignRight)
 
+        self.logout_button = QPushButton("Log out", self)
+        self.logout_button.setObjectName("logoutButton")
+        self.logout_button.clicked.connect(self.log_out)
+        self.right_layout.addWidget(self.logout_button, alignment=Qt.AlignTop | Qt.AlignRight)
+
         self.music_button = QPushButton(self)
         self.music_button.setIcon(QIcon("off.jpg"))
         self.music_button.setIconSize(QPixmap("off.jpg").size())
         self.music_button.setFixedSize(80, 80)
-        self.music_button.setStyleSheet("border: none; background-color: transparent;")
+        self.music_button.setObjectName("musicButton")
         self.music_button.clicked.connect(self.toggle_music)
 
         self.right_layout.addWidget(self.music_button, alignment=Qt.AlignBottom | Qt.AlignRight)
         self.main_layout.addWidget(self.right_section)
 
-    def button_style(self):
-        return """
-            QPushButton {
-                background-color: #5A7EC9;
-                color: white;
-                border-radius: 15px;
-                min-width: 30px;
-                max-width: 30px;
-                min-height: 30px;
-                max-height: 30px;
-                font-size: 14px;
-            }
-            QPushButton:hover {
-                background-color: #F7E0E3;
-            }
-        """
-
-
-    def add_button_style(self):
-        return """
-            QPushButton {
-                background-color: #5A7EC9;
-                color: white;
-                border-radius: 5px;
-                min-width: 60px;
-                max-width: 60px;
-                min-height: 20px;
-                max-height: 20px;
-                font-size: 12px;
-            }
-            QPushButton:hover {
-                background-color: #F7E0E3;
-            }
-        """
-
-    def progress_bar_style(self):
-        return """
-            QProgressBar {
-                min-width: 200px;
-                max-width: 200px;
-                height: 20px;
-                text-align: center;
-            }
-            QProgressBar::chunk {
-                background-color: #5A7EC9;
-            }
-        """
+    def init_media_player(self):
+        from PySide6.QtMultimedia import QMediaPlayer, QAudioOutput
+
+        self.media_player = QMediaPlayer(self)
+        self.audio_output = QAudioOutput(self)
+        self.media_player.setAudioOutput(self.audio_output)
+        # The backend loops without a gap; no EndOfMedia restart needed.
+        self.media_player.setLoops(QMediaPlayer.Infinite)
+        self.load_music()
 
     def toggle_music(self):
         if self.music_playing:
             self.media_player.stop()
             self.music_button.setIcon(QIcon("off.jpg"))
         else:
+            if self.media_player is None:
+                self.init_media_player()
             self.media_player.play()
             self.music_button.setIcon(QIcon("on.jpg"))
         self.music_playing = not self.music_playing
 
-    def loop_music(self, status):
-        if status == QMediaPlayer.EndOfMedia:
-            self.media_player.setPosition(0) 
+    def load_music(self):
+        data = themes.track_data(self.music_file)
+        if data is None:
+            self.media_player.setSource(QUrl.fromLocalFile(self.music_file))
+            self.music_buffer = None
+        else:
+            buffer = QBuffer()
+            buffer.setData(QByteArray(data))
+            buffer.open(QIODevice.ReadOnly)
+            self.media_player.setSourceDevice(buffer, QUrl.fromLocalFile(self.music_file))
+            self.music_buffer = buffer
+        if self.music_playing:
             self.media_player.play()
 
     def change_music(self, music_file):
-        self.media_player.stop()
-        self.media_player.setSource(QUrl.fromLocalFile(music_file))
-        if self.music_playing:
-            self.media_player.play()
+        if music_file == self.music_file:
+            return
+        self.music_file = music_file
+        if self.media_player is not None:
+            self.load_music()
 
     def apply_theme(self, theme):
-        
-        theme_files = {
-            "theme0": ("images/theme0.jpg", "music/m0.mp3"),
-            "theme1": ("images/theme1.jpg", "music/m1.mp3"),
-            "theme2": ("images/theme2.jpg", "music/m2.mp3"),
-            "theme3": ("images/theme3.jpg", "music/m3.mp3")
-        }
-        
-        if theme in theme_files:
-            bg_image, music_file = theme_files[theme]
-            self.setStyleSheet(f"""
-                QMainWindow {{
-                    background-image: url({bg_image});
-                    background-repeat: no-repeat;
-                    background-position: center;
-                }}
-            """)
-            self.change_music(music_file)
+        if theme in themes.THEME_FILES:
+            # Painted directly from the pre-decoded pixmap; no stylesheet
+            # change, so the child widgets are not re-polished on a switch.
+            self.background = themes.pixmap(theme, self.size())
+            self.update()
+            self.change_music(themes.THEME_FILES[theme][1])
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.drawPixmap(0, 0, self.background)
 
     def add_task_from_input(self):
         task_text = self.task_input.text()
@@ -274,237 +320,294 @@ class MainWindow(QMainWindow):
         if task_text:
             self.add_task(task_text, due_date)
             self.task_input.clear()
-
-    def parse_date(self, date_value):
-        """Handle different date formats from database"""
-        if isinstance(date_value, str):
-            try:
-                return QDate.fromString(date_value, "yyyy-MM-dd")
-            except:
-                try:
-                    return QDate.fromString(date_value, Qt.ISODate)
-                except:
-                    return QDate.currentDate()
-        elif hasattr(date_value, 'year'):
-            return QDate(date_value.year, date_value.month, date_value.day)
-        return QDate.currentDate()
-
-    def update_task_style(self, task_widget, due_date):
-        current_date = QDate.currentDate()
-        days_remaining = current_date.daysTo(due_date)
-        
-        if hasattr(task_widget, 'checkbox') and task_widget.checkbox.isChecked():
-            task_widget.setStyleSheet("""
-                background: rgba(144, 238, 144, 0.7);
-                border-radius: 5px;
-                padding: 5px;
-                border: 1px solid rgba(50, 200, 50, 0.9);
-            """)
-        elif days_remaining < 0:
-            task_widget.setStyleSheet("""
-                background: rgba(255, 50, 50, 150);
-                border-radius: 5px;
-                padding: 5px;
-                border: 1px solid rgba(255, 0, 0, 200);
-            """)
-        elif days_remaining == 0:
-            task_widget.setStyleSheet("""
-                background: rgba(255, 165, 0, 100);
-                border-radius: 5px;
-                padding: 5px;
-                border: 1px solid rgba(255, 140, 0, 150);
-            """)
-        elif days_remaining <= 7:
-            task_widget.setStyleSheet("""
-                background: rgba(255, 215, 0, 80);
-                border-radius: 5px;
-                padding: 5px;
-                border: 1px solid rgba(255, 215, 0, 120);
-            """)
-        else:
-            task_widget.setStyleSheet("""
-                background: rgba(173, 216, 230, 0.3);
-                border-radius: 5px;
-                padding: 5px;
-            """)
+            # New tasks land in the full list; show it rather than results
+            # the new task may not belong to.
+            self.clear_search()
 
     def add_task(self, task_text, due_date):
-        task_widget = QWidget()
-        task_layout = QHBoxLayout(task_widget)
-        task_layout.setContentsMargins(5, 5, 5, 5)
-
-        checkbox = QCheckBox()
-        checkbox.stateChanged.connect(lambda state: [
-            self.update_task_style(task_widget, date_input.date()),
-            self.update_task_in_db(task_widget),
-            self.update_progress()
-        ])
-        task_layout.addWidget(checkbox)
-
-        task_edit = QLineEdit(task_text)
-        task_edit.setStyleSheet("border: none; background: transparent; color: black;")
-        task_edit.textChanged.connect(lambda: self.update_task_in_db(task_widget))
-        task_layout.addWidget(task_edit)
-
-        date_input = QDateEdit()
-        date_input.setCalendarPopup(True)
-        date_input.setDate(self.parse_date(due_date))
-        date_input.setStyleSheet(self.date_input_style())
-        date_input.dateChanged.connect(lambda date: [
-            self.update_task_style(task_widget, date),
-            self.update_task_in_db(task_widget)
-        ])
-        task_layout.addWidget(date_input)
-
-        delete_button = QPushButton("🗑️")
-        delete_button.setStyleSheet("""
-            QPushButton {
-                background-color: transparent;
-                border: none;
-                font-size: 14px;
-                color: black;
-            }
-        """)
-        delete_button.clicked.connect(lambda: self.delete_task(task_widget))
-        task_layout.addWidget(delete_button)
-
-        task_id = save_task(self.user_id, task_text, due_date, 0)
-
-        task_widget.task_id = task_id
-        task_widget.checkbox = checkbox
-        task_widget.task_edit = task_edit
-        task_widget.date_input = date_input
-
-        self.update_task_style(task_widget, date_input.date())
-        self.scroll_layout.addWidget(task_widget)
-        self.update_progress()
+        task = self.task_model.make_task(None, task_text, due_date, 0)
+        task["client_ref"] = uuid.uuid4().hex
+        self.task_model.append_task(task)
+
+        # The row is painted as pending until the server insert returns its
+        # task_id; edits and deletes before then are journaled by client_ref.
+        self.task_sync.record(self.service.add, task_text, due_date, 0, task["client_ref"]).then(
+            lambda added: None if added else self.task_not_saved(task),
+            lambda error: self.task_not_saved(task)
+        )
+
+    def task_not_saved(self, task):
+        self.task_model.remove_task(task)
+        self.task_input.setText(task["task_text"])
+        self.task_input.setPlaceholderText("Could not save task, try again")
+
+    def task_synced(self, client_ref, task_id):
+        self.write_queue.assign_task_id(client_ref, task_id)
+        self.task_model.assign_task_id(client_ref, task_id)
+
+    def sync_state_changed(self, online):
+        self.progress_bar.setFormat("%p%" if online else "Offline, changes saved locally")
 
     def load_user_tasks(self):
-        tasks = get_user_tasks(self.user_id)
-        
-        for task in tasks:
-            task_widget = QWidget()
-            task_layout = QHBoxLayout(task_widget)
-            task_layout.setContentsMargins(5, 5, 5, 5)
-
-            checkbox = QCheckBox()
-            checkbox.setChecked(bool(task['is_completed']))
-            
-            date_input = QDateEdit()
-            date_input.setCalendarPopup(True)
-            date_input.setDate(self.parse_date(task['due_date']))
-            date_input.setStyleSheet(self.date_input_style())
-            
-            checkbox.stateChanged.connect(lambda state, tw=task_widget, di=date_input: [
-                self.update_task_style(tw, di.date()),
-                self.update_task_in_db(tw),
-                self.update_progress()
-            ])
-            task_layout.addWidget(checkbox)
-
-            task_edit = QLineEdit(task['task_text'])
-            task_edit.setStyleSheet("border: none; background: transparent; color: black;")
-            task_edit.textChanged.connect(lambda: self.update_task_in_db(task_widget))
-            task_layout.addWidget(task_edit)
-
-            date_input.dateChanged.connect(lambda date, tw=task_widget: [
-                self.update_task_style(tw, date),
-                self.update_task_in_db(tw)
-            ])
-            task_layout.addWidget(date_input)
-
-            delete_button = QPushButton("🗑️")
-            delete_button.setStyleSheet("""
-                QPushButton {
-                    background-color: transparent;
-                    border: none;
-                    font-size: 14px;
-                    color: black;
-                }
-            """)
-            delete_button.clicked.connect(lambda: self.delete_task(task_widget))
-            task_layout.addWidget(delete_button)
-
-            task_widget.task_id = task['task_id']
-            task_widget.checkbox = checkbox
-            task_widget.task_edit = task_edit
-            task_widget.date_input = date_input
-
-            self.update_task_style(task_widget, date_input.date())
-            self.scroll_layout.addWidget(task_widget)
-        
-        self.update_progress()
-
-    def update_task_in_db(self, task_widget):
-        is_checked = 1 if task_widget.checkbox.isChecked() else 0
-        update_task_details(
-            task_id=task_widget.task_id,
-            new_text=task_widget.task_edit.text(),
-            due_date=task_widget.date_input.date().toString("yyyy-MM-dd"),
-            is_completed=is_checked
+        # Results of an earlier load still on their way are dropped; see
+        # this_load().
+        self.load_generation += 1
+        self.task_model.reset_paging()
+        # Hold off paging until we know whether the local cache has this user.
+        self.task_model.loading = True
+        db_async.submit(self.service.cached).then(
+            self.this_load(lambda cached: self.cached_tasks_loaded(*cached)),
+            self.this_load(lambda error: self.cached_tasks_loaded([], None))
         )
 
-    def delete_task(self, task_widget):
-        delete_task(task_widget.task_id)
-        task_widget.deleteLater()
-        self.update_progress()
+    def this_load(self, callback):
+        """callback, but a no-op once load_user_tasks() has started over."""
+        generation = self.load_generation
+        return lambda *args: callback(*args) if generation == self.load_generation else None
+
+    def cached_tasks_loaded(self, rows, watermark):
+        if watermark is None:
+            # Nothing cached yet: page from the server as before while a full
+            # sync fills the cache in the background for the next launch.
+            self.task_model.loading = False
+            self.load_task_pages()
+            db_async.submit(self.service.sync_cache, None, serial=True)
+            return
 
-    def update_progress(self):
-        total_tasks = self.scroll_layout.count()
-        if total_tasks == 0:
-            self.progress_bar.setValue(0)
+        # The cache and its delta cover more than a prefetched first page.
+        self.first_page = None
+        self.task_model.append_page(rows, len(rows) + 1)
+        self.task_model.count_loaded_pages()
+        # Serial, like the stats query: an add or delete made after this
+        # point reaches the server after the delta has been read.
+        db_async.submit(self.service.sync_cache, watermark, serial=True).then(
+            self.this_load(self.task_changes_loaded),
+            self.this_load(lambda error: self.load_journal())
+        )
+
+    def task_changes_loaded(self, changes):
+        if changes is not None:
+            rows, deleted_ids = changes
+            # Anything edited here since the delta was read has newer values
+            # on their way to the server; keep those, and don't bring back
+            # what was deleted meanwhile.
+            edits = self.unsynced_edits()
+            rows = [row for row in rows if row["task_id"] not in edits and row["task_id"] not in self.deleted_ids]
+            self.task_model.apply_changes(rows, deleted_ids)
+        self.load_journal()
+
+    def load_journal(self):
+        # Writes still in the journal from an earlier session (made offline,
+        # or cut short by closing the app) go on top of what was loaded;
+        # then the replay of them starts.
+        db_async.submit(self.service.pending, local=True).then(
+            self.this_load(self.journal_loaded),
+            lambda error: self.task_sync.replay_soon()
+        )
+
+    def journal_loaded(self, entries):
+        updates = {}
+        deleted_ids = []
+        # Tasks not on the server yet, by client_ref; their own updates and
+        # deletes are folded in before they are shown.
+        added = {}
+        for entry in entries:
+            if entry["op"] == "add":
+                task = self.task_model.make_task(None, entry["task_text"], entry["due_date"], entry["is_completed"])
+                task["client_ref"] = entry["client_ref"]
+                added[entry["client_ref"]] = task
+            elif entry["task_id"] is None:
+                task = added.pop(entry["client_ref"], None)
+                if task is not None and entry["op"] == "update":
+                    task.update(self.task_model.make_task(None, entry["task_text"], entry["due_date"], entry["is_completed"]))
+                    added[entry["client_ref"]] = task
+            elif entry["op"] == "update":
+                updates[entry["task_id"]] = entry
+            elif entry["op"] == "delete":
+                updates.pop(entry["task_id"], None)
+                deleted_ids.append(entry["task_id"])
+        for task in added.values():
+            self.task_model.append_task(task)
+        self.journaled_edits.update(updates)
+        self.task_model.apply_changes(list(updates.values()), deleted_ids, insert_missing=False)
+        self.task_sync.replay_soon()
+
+    def load_task_pages(self):
+        # Only the first page is requested here; the list view asks for the
+        # next one through fetchMore() as the user scrolls towards the end.
+        # Queued on the writer thread so the totals can't include any add or
+        # delete made after this point; those arrive as deltas on top.
+        db_async.submit(self.service.stats, serial=True).then(
+            self.this_load(lambda stats: self.task_model.add_counts(*stats) if stats else self.task_model.count_loaded_pages()),
+            self.this_load(lambda error: self.task_model.count_loaded_pages())
+        )
+        self.journal_pending = True
+        self.task_model.fetchMore()
+
+    def fetch_task_page(self, after_task_id):
+        if after_task_id == 0 and self.first_page is not None:
+            rows, self.first_page = self.first_page, None
+            self.task_page_loaded(rows)
             return
+        self.progress_bar.setFormat("Loading tasks...")
+        db_async.submit(self.service.page, after_task_id, TASK_PAGE_SIZE).then(
+            self.this_load(self.task_page_loaded),
+            self.this_load(lambda error: self.task_page_failed())
+        )
 
-        completed_tasks = 0
-        for i in range(total_tasks):
-            task_widget = self.scroll_layout.itemAt(i).widget()
-            if task_widget and task_widget.checkbox.isChecked():
-                completed_tasks += 1
-
-        progress = int((completed_tasks / total_tasks) * 100)
-        self.progress_bar.setValue(progress)
-
-    def date_input_style(self):
-        return """
-            QDateEdit {
-                background-color: white;
-                border: 1px solid #5A7EC9;
-                border-radius: 5px;
-                padding: 2px;
-            }
-            QDateEdit::drop-down {
-                subcontrol-origin: padding;
-                subcontrol-position: top right;
-                width: 20px;
-                border-left: 1px solid #5A7EC9;
-            }
-            QDateEdit::down-arrow {
-                color: gray;
-                width: 16px;
-                height: 16px;
-            }
-            QCalendarWidget {
-                background-color: white;
-                color: black;
-            }
-            QCalendarWidget QToolButton {
-                background-color: #5A7EC9;
-                color: white;
-                border-radius: 5px;
-            }
-            QCalendarWidget QMenu {
-                background-color: white;
-                color: black;
-            }
-            QCalendarWidget QWidget#qt_calendar_navigationbar {
-                background-color: #5A7EC9;
-                color: white;
-            }
-            QCalendarWidget QAbstractItemView {
-                background-color: white;
-                color: black;
-            }
-            QCalendarWidget QAbstractItemView:disabled {
-                color: gray;
-            }
-        """
\ No newline at end of file
+    def task_page_loaded(self, rows):
+        self.progress_bar.setFormat("%p%")
+        self.task_model.append_page(rows, TASK_PAGE_SIZE)
+        self.first_page_done()
+
+    def task_page_failed(self):
+        self.progress_bar.setFormat("Could not load tasks")
+        self.task_model.page_failed()
+        self.first_page_done()
+
+    def first_page_done(self):
+        if self.journal_pending:
+            self.journal_pending = False
+            self.load_journal()
+
+    def search_query(self):
+        """query_tasks arguments for the search row, or None when it asks for the plain list."""
+        text = self.search_input.text().strip()
+        filter_name = self.search_filter.currentText()
+        sort = self.search_sort.currentData()
+        if not text and filter_name == "All" and sort == "created":
+            return None
+
+        args = {"text": text, "sort": sort}
+        today = QDate.currentDate()
+        if filter_name == "Completed":
+            args["status"] = "completed"
+        elif filter_name != "All":
+            args["status"] = "pending"
+        if filter_name == "Overdue":
+            args["due_to"] = today.addDays(-1).toString("yyyy-MM-dd")
+        elif filter_name == "Due this week":
+            args["due_from"] = today.toString("yyyy-MM-dd")
+            args["due_to"] = today.addDays(7).toString("yyyy-MM-dd")
+        return args
+
+    def run_search(self):
+        self.search_timer.stop()
+        # Answers to earlier searches may still be on their way; the
+        # generation lets search_page_loaded drop them.
+        self.search_generation += 1
+        self.search_args = self.search_query()
+        self.search_after = None
+        if self.search_args is None:
+            self.task_list.setModel(self.task_model)
+            self.search_model.reset_paging()
+            return
+        self.search_model.reset_paging()
+        self.task_list.setModel(self.search_model)
+        self.search_model.fetchMore()
+
+    def clear_search(self):
+        if self.search_args is None:
+            return
+        for widget in (self.search_input, self.search_filter, self.search_sort):
+            widget.blockSignals(True)
+        self.search_input.clear()
+        self.search_filter.setCurrentIndex(0)
+        self.search_sort.setCurrentIndex(0)
+        for widget in (self.search_input, self.search_filter, self.search_sort):
+            widget.blockSignals(False)
+        self.run_search()
+
+    def fetch_search_page(self, after_task_id):
+        # Sorted by due date, the keyset is the whole last row, not just its id.
+        generation = self.search_generation
+        db_async.submit(self.service.list, after=self.search_after, **self.search_args).then(
+            lambda rows: self.search_page_loaded(generation, rows),
+            lambda error: self.search_page_loaded(generation, None)
+        )
+
+    def search_page_loaded(self, generation, rows):
+        if generation != self.search_generation:
+            return
+        if rows is None:
+            self.search_model.page_failed()
+            return
+        if rows:
+            self.search_after = rows[-1]
+        # Edits still on their way to the server go on top of the page, as
+        # they do in the full list.
+        edits = self.unsynced_edits()
+        if edits:
+            rows = [edits.get(row["task_id"], row) for row in rows]
+        self.search_model.append_page(rows, TASK_PAGE_SIZE)
+
+    def unsynced_edits(self):
+        """Rows, by task_id, for the edits made here that the server may not have yet."""
+        edits = dict(self.journaled_edits)
+        edits.update(edit_rows(self.write_queue.latest))
+        return edits
+
+    def edits_journaled(self, batch):
+        self.journaled_edits.update(edit_rows(batch))
+        self.task_sync.replay_soon()
+
+    def edits_synced(self):
+        self.journaled_edits = {}
+        self.deleted_ids = set()
+
+    def task_edited(self, task):
+        self.update_task_in_db(task)
+        if self.task_list.model() is self.search_model:
+            self.task_model.apply_changes([task], [], insert_missing=False)
+
+    def update_task_in_db(self, task):
+        self.write_queue.schedule(
+            task["task_id"],
+            task["task_text"],
+            task["due_date"].toString("yyyy-MM-dd"),
+            1 if task["is_completed"] else 0,
+            task.get("client_ref")
+        )
+
+    def journal_updates(self, rows):
+        # Runs on the local writer thread for TaskWriteQueue; one journal
+        # append (and fsync) per coalesced batch of edits.
+        return self.service.update_many(rows)
+
+    def delete_task(self, task):
+        self.write_queue.discard(task["task_id"], task.get("client_ref"))
+        self.task_sync.record(self.service.delete, task["task_id"], task.get("client_ref"))
+        self.search_model.remove_task(task)
+        if task["task_id"] is None:
+            self.task_model.remove_task(task)
+        else:
+            self.deleted_ids.add(task["task_id"])
+            self.task_model.apply_changes([], [task["task_id"]])
+
+    def closeEvent(self, event):
+        self.write_queue.flush()
+        super().closeEvent(event)
+
+    def log_out(self):
+        # Edits still coalescing are journaled under this user first; the
+        # next window's TaskSync replays them whoever signs in.
+        self.write_queue.flush()
+        self.search_timer.stop()
+        self.task_sync.stop()
+        db_async.submit(forget_session, serial=True)
+        self.logout_callback()
+
+    def update_progress(self):
+        self.progress_bar.setValue(progress_percent(self.task_model.total, self.task_model.completed))
+
+    def show_reminders(self, tasks):
+        if not QSystemTrayIcon.isSystemTrayAvailable():
+            return
+        if self.tray_icon is None:
+            self.tray_icon = QSystemTrayIcon(QIcon(ICON_PATH), self)
+            self.tray_icon.show()
+        titles = [task["task_text"] for task in tasks[:REMINDER_TITLES]]
+        if len(tasks) > REMINDER_TITLES:
+            titles.append(f"and {len(tasks) - REMINDER_TITLES} more")
+        heading = "1 task due today" if len(tasks) == 1 else f"{len(tasks)} tasks due today"
+        self.tray_icon.showMessage(heading, "\n".join(titles), QIcon(ICON_PATH))
\ No newline at end of file
@@ -0,0 +1,108 @@
+import sqlite3
+from functools import lru_cache
+
+SQLITE_PRAGMAS = (
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA foreign_keys = ON",
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA cache_size = -16000",
+    "PRAGMA mmap_size = 67108864",
+)
+SQLITE_BUSY_TIMEOUT = 5.0
+SQLITE_STATEMENT_CACHE = 256
+
+
+class MySQLBackend:
+    name = "mysql"
+
+    def __init__(self, config):
+        # Imported here so SQLite-only installs don't need mysql-connector.
+        import mysql.connector
+        self.driver = mysql.connector
+        self.config = config
+        self.Error = mysql.connector.Error
+        self.IntegrityError = mysql.connector.IntegrityError
+
+    def connect(self):
+        return self.driver.connect(**self.config)
+
+    def is_alive(self, conn):
+        try:
+            conn.ping(reconnect=True, attempts=1, delay=0)
+            return True
+        except self.Error:
+            return False
+
+
+class SQLiteCursor:
+    """Gives a sqlite3 cursor the mysql-connector surface database.py is written against."""
+
+    def __init__(self, cursor, dictionary=False):
+        self._cursor = cursor
+        if dictionary:
+            cursor.row_factory = _dict_row
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def execute(self, query, params=()):
+        self._cursor.execute(_qmark(query), params)
+        return self
+
+    def executemany(self, query, seq_of_params):
+        self._cursor.executemany(_qmark(query), seq_of_params)
+        return self
+
+
+class SQLiteConnection:
+    def __init__(self, conn):
+        self._conn = conn
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def cursor(self, dictionary=False):
+        return SQLiteCursor(self._conn.cursor(), dictionary)
+
+
+class SQLiteBackend:
+    name = "sqlite"
+    Error = sqlite3.Error
+    IntegrityError = sqlite3.IntegrityError
+    # Local file, nothing to go stale between checkouts.
+    is_alive = None
+
+    def __init__(self, path):
+        self.path = path
+
+    def connect(self):
+        # The pool hands a connection to one thread at a time, so it may be
+        # used from whichever worker thread checks it out.
+        conn = sqlite3.connect(
+            self.path,
+            timeout=SQLITE_BUSY_TIMEOUT,
+            check_same_thread=False,
+            cached_statements=SQLITE_STATEMENT_CACHE,
+        )
+        for pragma in SQLITE_PRAGMAS:
+            conn.execute(pragma)
+        return SQLiteConnection(conn)
+
+
+@lru_cache(maxsize=512)
+def _qmark(query):
+    # database.py uses mysql-style %s placeholders; sqlite3 wants ?.
+    return query.replace("%s", "?")
+
+
+def _dict_row(cursor, row):
+    return {column[0]: value for column, value in zip(cursor.description, row)}
+
+
+def create_backend(name, mysql_config=None, sqlite_path=None):
+    if name == "mysql":
+        return MySQLBackend(mysql_config)
+    if name == "sqlite":
+        return SQLiteBackend(sqlite_path)
+    raise ValueError(f"Unknown database backend: {name}")
@@ -0,0 +1,157 @@
+from PySide6.QtGui import QColor
+
+ACCENT_COLOR = "#5A7EC9"
+HOVER_COLOR = "#F7E0E3"
+
+# (background, border) per urgency, used by TaskDelegate to paint rows.
+URGENCY_COLORS = {
+    "done": (QColor(144, 238, 144, 178), QColor(50, 200, 50, 229)),
+    "overdue": (QColor(255, 50, 50, 150), QColor(255, 0, 0, 200)),
+    "today": (QColor(255, 165, 0, 100), QColor(255, 140, 0, 150)),
+    "week": (QColor(255, 215, 0, 80), QColor(255, 215, 0, 120)),
+    "later": (QColor(173, 216, 230, 76), None),
+}
+
+# Applied once to MainWindow's central widget. Widgets pick their rules up by
+# objectName, and per-state looks hang off dynamic properties such as
+# [urgency="overdue"], so a state change re-polishes just that one widget
+# (see set_style_property) instead of re-parsing a stylesheet string.
+MAIN_WINDOW_STYLE = f"""
+    QWidget#leftSection, QWidget#rightSection, QWidget#clockWidget {{
+        background: transparent;
+    }}
+
+    QLabel#clockLabel {{
+        font-size: 24px;
+        font-weight: bold;
+        color: {ACCENT_COLOR};
+        background: transparent;
+    }}
+
+    QPushButton#themeButton {{
+        background-color: {ACCENT_COLOR};
+        color: white;
+        border-radius: 15px;
+        min-width: 30px;
+        max-width: 30px;
+        min-height: 30px;
+        max-height: 30px;
+        font-size: 14px;
+    }}
+    QPushButton#themeButton:hover {{
+        background-color: {HOVER_COLOR};
+    }}
+
+    QPushButton#addTaskButton, QPushButton#logoutButton {{
+        background-color: {ACCENT_COLOR};
+        color: white;
+        border-radius: 5px;
+        min-width: 60px;
+        max-width: 60px;
+        min-height: 20px;
+        max-height: 20px;
+        font-size: 12px;
+    }}
+    QPushButton#addTaskButton:hover, QPushButton#logoutButton:hover {{
+        background-color: {HOVER_COLOR};
+    }}
+
+    QPushButton#musicButton {{
+        border: none;
+        background-color: transparent;
+    }}
+
+    QLineEdit#taskInput, QLineEdit#searchInput {{
+        background-color: white;
+        border-radius: 5px;
+        min-width: 200px;
+        padding: 5px;
+        border: 2px solid {ACCENT_COLOR};
+    }}
+
+    QListView#taskList {{
+        background: transparent;
+        border: none;
+    }}
+
+    QLineEdit#taskTextEditor {{
+        border: none;
+        background: transparent;
+        color: black;
+    }}
+
+    QProgressBar {{
+        min-width: 200px;
+        max-width: 200px;
+        height: 20px;
+        text-align: center;
+        background: transparent;
+    }}
+    QProgressBar::chunk {{
+        background-color: {ACCENT_COLOR};
+    }}
+
+    QDateEdit, QComboBox {{
+        background-color: white;
+        border: 1px solid {ACCENT_COLOR};
+        border-radius: 5px;
+        padding: 2px;
+    }}
+    QDateEdit[urgency="overdue"] {{
+        border-color: rgb(255, 0, 0);
+    }}
+    QDateEdit[urgency="today"] {{
+        border-color: rgb(255, 140, 0);
+    }}
+    QDateEdit[urgency="week"] {{
+        border-color: rgb(255, 215, 0);
+    }}
+    QDateEdit[urgency="done"] {{
+        border-color: rgb(50, 200, 50);
+    }}
+    QDateEdit::drop-down {{
+        subcontrol-origin: padding;
+        subcontrol-position: top right;
+        width: 20px;
+        border-left: 1px solid {ACCENT_COLOR};
+    }}
+    QDateEdit::down-arrow {{
+        color: gray;
+        width: 16px;
+        height: 16px;
+    }}
+    QCalendarWidget {{
+        background-color: white;
+        color: black;
+    }}
+    QCalendarWidget QToolButton {{
+        background-color: {ACCENT_COLOR};
+        color: white;
+        border-radius: 5px;
+    }}
+    QCalendarWidget QMenu {{
+        background-color: white;
+        color: black;
+    }}
+    QCalendarWidget QWidget#qt_calendar_navigationbar {{
+        background-color: {ACCENT_COLOR};
+        color: white;
+    }}
+    QCalendarWidget QAbstractItemView {{
+        background-color: white;
+        color: black;
+    }}
+    QCalendarWidget QAbstractItemView:disabled {{
+        color: gray;
+    }}
+"""
+
+
+def set_style_property(widget, name, value):
+    """Set a dynamic property used in a stylesheet selector and re-polish only this widget."""
+    if widget.property(name) == value:
+        return
+    widget.setProperty(name, value)
+    style = widget.style()
+    style.unpolish(widget)
+    style.polish(widget)
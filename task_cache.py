@@ -0,0 +1,155 @@
+"""On-disk copy of each user's tasks, so the task list can be shown before the server answers.
+
+The copy is kept current with database.get_task_changes(): each sync sends
+the watermark of the previous one and only applies the rows changed (and
+tasks deleted) since. The file is disposable; delete it and the next login
+simply fetches everything again.
+"""
+import os
+import sqlite3
+import threading
+from db_pool import ConnectionPool
+from storage import create_backend
+from database import get_task_changes
+
+TASK_CACHE_PATH = os.environ.get("SAKU_TASK_CACHE_PATH", "task_cache.db")
+TASK_CACHE_POOL_SIZE = 2
+# Bump when the tables below change; an older cache file is rebuilt empty.
+CACHE_SCHEMA_VERSION = 1
+
+CACHE_SCHEMA = [
+    '''
+    CREATE TABLE IF NOT EXISTS cached_tasks (
+        user_id INTEGER NOT NULL,
+        task_id INTEGER NOT NULL,
+        task_text TEXT NOT NULL,
+        due_date TEXT,
+        is_completed INTEGER NOT NULL,
+        PRIMARY KEY (user_id, task_id)
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS cache_state (
+        user_id INTEGER PRIMARY KEY,
+        watermark TEXT NOT NULL
+    )
+    ''',
+]
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _connect():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            pool = ConnectionPool(create_backend("sqlite", sqlite_path=TASK_CACHE_PATH).connect,
+                                  size=TASK_CACHE_POOL_SIZE)
+            conn = pool.acquire()
+            try:
+                _ensure_schema(conn)
+            finally:
+                conn.close()
+            _pool = pool
+    return _pool.acquire()
+
+
+def _ensure_schema(conn):
+    cursor = conn.cursor()
+    cursor.execute("PRAGMA user_version")
+    if cursor.fetchone()[0] != CACHE_SCHEMA_VERSION:
+        cursor.execute("DROP TABLE IF EXISTS cached_tasks")
+        cursor.execute("DROP TABLE IF EXISTS cache_state")
+    for statement in CACHE_SCHEMA:
+        cursor.execute(statement)
+    cursor.execute(f"PRAGMA user_version = {CACHE_SCHEMA_VERSION}")
+    conn.commit()
+
+
+def load_cached_tasks(user_id):
+    """(rows, watermark) from the local copy; watermark is None if the user was never synced."""
+    try:
+        conn = _connect()
+    except sqlite3.Error as err:
+        print(f"Task cache error: {err}")
+        return [], None
+    try:
+        cursor = conn.cursor(dictionary=True)
+        cursor.execute("SELECT watermark FROM cache_state WHERE user_id = %s", (user_id,))
+        state = cursor.fetchone()
+        if state is None:
+            return [], None
+        cursor.execute(
+            "SELECT task_id, task_text, due_date, is_completed FROM cached_tasks "
+            "WHERE user_id = %s ORDER BY task_id",
+            (user_id,)
+        )
+        return cursor.fetchall(), state["watermark"]
+    except sqlite3.Error as err:
+        print(f"Task cache error: {err}")
+        return [], None
+    finally:
+        conn.close()
+
+
+def store_changes(user_id, rows, deleted_ids, watermark, replace=False):
+    """Apply a delta to the local copy in one transaction; replace=True drops the user's old rows first."""
+    try:
+        conn = _connect()
+    except sqlite3.Error as err:
+        print(f"Task cache error: {err}")
+        return False
+    try:
+        cursor = conn.cursor()
+        if replace:
+            cursor.execute("DELETE FROM cached_tasks WHERE user_id = %s", (user_id,))
+        cursor.executemany(
+            "INSERT OR REPLACE INTO cached_tasks (user_id, task_id, task_text, due_date, is_completed) "
+            "VALUES (%s, %s, %s, %s, %s)",
+            [
+                (user_id, row["task_id"], row["task_text"], _iso_date(row["due_date"]), int(bool(row["is_completed"])))
+                for row in rows
+            ]
+        )
+        cursor.executemany(
+            "DELETE FROM cached_tasks WHERE user_id = %s AND task_id = %s",
+            [(user_id, task_id) for task_id in deleted_ids]
+        )
+        if watermark is not None:
+            cursor.execute(
+                "INSERT OR REPLACE INTO cache_state (user_id, watermark) VALUES (%s, %s)",
+                (user_id, watermark)
+            )
+        conn.commit()
+        return True
+    except sqlite3.Error as err:
+        conn.rollback()
+        print(f"Task cache error: {err}")
+        return False
+    finally:
+        conn.close()
+
+
+def sync_task_cache(user_id, watermark):
+    """Fetch what changed on the server since watermark and fold it into the local copy.
+
+    Returns (rows, deleted_ids) as fetched, or None if the server couldn't
+    be reached; the local copy is left as it was in that case.
+    """
+    changes = get_task_changes(user_id, watermark)
+    if changes is None:
+        return None
+    rows, deleted_ids, new_watermark = changes
+    full = deleted_ids is None
+    if full:
+        # Everything was sent; whatever the copy has beyond that is gone.
+        sent = {row["task_id"] for row in rows}
+        cached, _ = load_cached_tasks(user_id)
+        deleted_ids = [row["task_id"] for row in cached if row["task_id"] not in sent]
+    store_changes(user_id, rows, deleted_ids, new_watermark, replace=full)
+    return rows, deleted_ids
+
+
+def _iso_date(value):
+    return value.isoformat() if hasattr(value, "isoformat") else value
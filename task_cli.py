@@ -0,0 +1,184 @@
+"""Work with a user's tasks from the command line, or load-test the task data path, without Qt.
+
+    python task_cli.py list --user-id 3 --search milk --status pending --sort due
+    python task_cli.py add --user-id 3 "Buy milk" --due 2026-11-01
+    python task_cli.py done --user-id 3 42
+    python task_cli.py delete --user-id 3 42
+    python task_cli.py stats --user-id 3
+    python task_cli.py loadtest --users 1000 --tasks 20 --workers 32
+
+Everything goes straight to the server through an unjournaled TaskService.
+loadtest creates its own users (named load-<run>-<n>, with a placeholder
+password hash) and tasks, so point it at a scratch database.
+"""
+import argparse
+import statistics
+import sys
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from database import init_db, close_db, create_user, TASK_SORTS
+from task_service import TaskService, progress_percent
+import db_metrics
+
+
+def print_tasks(rows):
+    for row in rows:
+        mark = "x" if row["is_completed"] else " "
+        print(f"{row['task_id']:>8}  [{mark}]  {row['due_date'] or '':<10}  {row['task_text']}")
+
+
+def list_tasks(service, args):
+    after = None
+    shown = 0
+    while args.limit is None or shown < args.limit:
+        rows = service.list(text=args.search, status=args.status, due_from=args.due_from,
+                            due_to=args.due_to, sort=args.sort, after=after)
+        if rows is None:
+            sys.exit("Could not list tasks")
+        if args.limit is not None:
+            rows = rows[:args.limit - shown]
+        print_tasks(rows)
+        shown += len(rows)
+        if not rows:
+            break
+        after = rows[-1]
+
+
+class LoadStats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.samples = defaultdict(list)
+        self.failures = defaultdict(int)
+
+    def timed(self, op, fn, *args, **kwargs):
+        start = time.perf_counter()
+        result = fn(*args, **kwargs)
+        elapsed = (time.perf_counter() - start) * 1000
+        with self.lock:
+            self.samples[op].append(elapsed)
+            if result is None or result is False:
+                self.failures[op] += 1
+        return result
+
+    def report(self, elapsed):
+        print(f"{'operation':<10} {'count':>7} {'failed':>7} {'p50 ms':>9} {'p95 ms':>9} {'max ms':>9}")
+        total = 0
+        for op, samples in self.samples.items():
+            samples.sort()
+            total += len(samples)
+            p95 = db_metrics.percentile(samples, 0.95)
+            print(f"{op:<10} {len(samples):>7} {self.failures[op]:>7} "
+                  f"{statistics.median(samples):>9.2f} {p95:>9.2f} {samples[-1]:>9.2f}")
+        print(f"{total} operations in {elapsed:.2f}s, {total / elapsed:.0f} ops/s")
+
+
+def simulate_user(stats, run, n, task_count):
+    """One simulated user: add tasks, page and search them, complete half, delete a quarter."""
+    user_id = stats.timed("signup", create_user, f"load-{run}-{n}", "load-test")
+    if user_id is None:
+        return
+    service = TaskService(user_id, journaled=False)
+    today = date.today()
+    added = [
+        stats.timed("add", service.add, f"load task {i} for user {n}", (today + timedelta(days=i % 14)).isoformat())
+        for i in range(task_count)
+    ]
+    pending = stats.timed("list", service.list, status="pending", sort="due") or []
+    for task in pending[:task_count // 2]:
+        stats.timed("complete", service.complete, task)
+    stats.timed("search", service.list, text="load task")
+    for task in [task for task in added if task][:task_count // 4]:
+        stats.timed("delete", service.delete, task["task_id"])
+    stats.timed("stats", service.stats)
+
+
+def load_test(args):
+    stats = LoadStats()
+    run = str(int(time.time()))
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        for future in [pool.submit(simulate_user, stats, run, n, args.tasks) for n in range(args.users)]:
+            future.result()
+    stats.report(time.perf_counter() - start)
+
+    # The same run as database.py saw it: per query function, including
+    # the wait for a pooled connection.
+    print(f"\n{'database operation':<22} {'count':>7} {'errors':>7} {'p50 ms':>9} {'p95 ms':>9} "
+          f"{'p99 ms':>9} {'acquire ms':>11}")
+    for name, op in sorted(db_metrics.snapshot()["operations"].items()):
+        print(f"{name:<22} {op['count']:>7} {op['errors']:>7} {op['p50_ms']:>9.2f} {op['p95_ms']:>9.2f} "
+              f"{op['p99_ms']:>9.2f} {op['acquire_mean_ms']:>11.2f}")
+    db_metrics.write_prometheus()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    list_parser = commands.add_parser("list")
+    list_parser.add_argument("--search", default="")
+    list_parser.add_argument("--status", choices=("pending", "completed"))
+    list_parser.add_argument("--due-from")
+    list_parser.add_argument("--due-to")
+    list_parser.add_argument("--sort", choices=tuple(TASK_SORTS), default="created")
+    list_parser.add_argument("--limit", type=int)
+
+    add_parser = commands.add_parser("add")
+    add_parser.add_argument("text")
+    add_parser.add_argument("--due", default=date.today().isoformat())
+
+    for name in ("done", "undo", "delete"):
+        commands.add_parser(name).add_argument("task_id", type=int)
+    commands.add_parser("stats")
+
+    for command in ("list", "add", "done", "undo", "delete", "stats"):
+        commands.choices[command].add_argument("--user-id", type=int, required=True)
+
+    load_parser = commands.add_parser("loadtest")
+    load_parser.add_argument("--users", type=int, default=100)
+    load_parser.add_argument("--tasks", type=int, default=20, help="tasks per user")
+    load_parser.add_argument("--workers", type=int, default=16, help="users simulated at once")
+    args = parser.parse_args()
+
+    # One pooled connection per concurrent simulated user.
+    if not init_db(pool_size=args.workers if args.command == "loadtest" else 1):
+        sys.exit("Could not open the database")
+    try:
+        if args.command == "loadtest":
+            load_test(args)
+            return
+
+        service = TaskService(args.user_id, journaled=False)
+        if args.command == "list":
+            list_tasks(service, args)
+        elif args.command == "add":
+            task = service.add(args.text, args.due)
+            if task is None:
+                sys.exit("Could not add task")
+            print(task["task_id"])
+        elif args.command in ("done", "undo"):
+            task = service.get(args.task_id)
+            if task is None:
+                sys.exit(f"No task {args.task_id}")
+            if not service.complete(task, args.command == "done"):
+                sys.exit("Could not update task")
+        elif args.command == "delete":
+            if service.get(args.task_id) is None:
+                sys.exit(f"No task {args.task_id}")
+            if not service.delete(args.task_id):
+                sys.exit("Could not delete task")
+        elif args.command == "stats":
+            stats = service.stats()
+            if stats is None:
+                sys.exit("Could not fetch stats")
+            total, completed = stats
+            print(f"{completed}/{total} done ({progress_percent(total, completed)}%)")
+    finally:
+        close_db()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Stream a user's tasks to and from CSV or JSON Lines.
+
+    python task_io.py export --user-id 3 tasks.jsonl
+    python task_io.py import --user-id 3 tasks.csv
+    python task_io.py export --user-id 3 --format csv - > tasks.csv
+
+Files are read and written row by row, so memory stays flat however many
+tasks are moved; imports go to the database in multi-row batches inside a
+single transaction.
+"""
+import argparse
+import csv
+import json
+import sys
+import time
+from contextlib import nullcontext
+from database import iter_user_tasks, save_tasks_many
+
+FIELDS = ("task_id", "task_text", "due_date", "is_completed")
+EXPORT_BATCH_SIZE = 5000
+
+
+def detect_format(path, fmt):
+    if fmt:
+        return fmt
+    return "csv" if path.lower().endswith(".csv") else "jsonl"
+
+
+def export_rows(user_id):
+    for batch in iter_user_tasks(user_id, EXPORT_BATCH_SIZE):
+        for task in batch:
+            due_date = task["due_date"]
+            yield {
+                "task_id": task["task_id"],
+                "task_text": task["task_text"],
+                "due_date": due_date.isoformat() if hasattr(due_date, "isoformat") else due_date,
+                "is_completed": int(bool(task["is_completed"])),
+            }
+
+
+def write_tasks(rows, out, fmt):
+    count = 0
+    if fmt == "csv":
+        writer = csv.DictWriter(out, fieldnames=FIELDS)
+        writer.writeheader()
+        for row in rows:
+            writer.writerow(row)
+            count += 1
+    else:
+        for row in rows:
+            out.write(json.dumps(row, ensure_ascii=False))
+            out.write("\n")
+            count += 1
+    return count
+
+
+def read_tasks(src, fmt):
+    rows = csv.DictReader(src) if fmt == "csv" else (json.loads(line) for line in src if line.strip())
+    for row in rows:
+        yield (
+            row["task_text"],
+            row.get("due_date") or None,
+            int(str(row.get("is_completed", 0)).strip().lower() in ("1", "true")),
+        )
+
+
+def open_stream(path, mode):
+    if path == "-":
+        return nullcontext(sys.stdout if "w" in mode else sys.stdin)
+    return open(path, mode, encoding="utf-8", newline="")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("command", choices=("import", "export"))
+    parser.add_argument("path", help="file to read or write, - for stdin/stdout")
+    parser.add_argument("--user-id", type=int, required=True)
+    parser.add_argument("--format", choices=("csv", "jsonl"))
+    args = parser.parse_args()
+
+    fmt = detect_format(args.path, args.format)
+    start = time.perf_counter()
+    if args.command == "export":
+        with open_stream(args.path, "w") as out:
+            count = write_tasks(export_rows(args.user_id), out, fmt)
+    else:
+        with open_stream(args.path, "r") as src:
+            count = save_tasks_many(args.user_id, read_tasks(src, fmt))
+        if count is None:
+            sys.exit("Import failed, nothing was saved")
+    print(f"{args.command}ed {count} tasks in {time.perf_counter() - start:.2f}s", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""Durable, append-only journal of task writes on their way to the server.
+
+The task list never writes to the server directly: adds, edits and deletes
+are appended here first, one fsync per batch, and task_sync.TaskSync
+replays them in order through database.apply_task_journal(). Entries are
+only removed once the server has committed them, so they survive the
+server being down, the app being closed and crashes in between.
+"""
+import os
+import sqlite3
+import threading
+from db_pool import ConnectionPool
+from storage import create_backend
+from database import apply_task_journal
+
+JOURNAL_PATH = os.environ.get("SAKU_JOURNAL_PATH", "task_journal.db")
+JOURNAL_POOL_SIZE = 2
+REPLAY_BATCH_SIZE = 200
+
+JOURNAL_SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS journal (
+        seq INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER NOT NULL,
+        op TEXT NOT NULL,
+        task_id INTEGER,
+        client_ref TEXT,
+        task_text TEXT,
+        due_date TEXT,
+        is_completed INTEGER
+    )
+'''
+FIELDS = ("user_id", "op", "task_id", "client_ref", "task_text", "due_date", "is_completed")
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _open():
+    conn = create_backend("sqlite", sqlite_path=JOURNAL_PATH).connect()
+    # The WAL default of NORMAL may lose the last commits on power loss;
+    # FULL syncs every commit, which is why appends come in batches.
+    conn.execute("PRAGMA synchronous = FULL")
+    return conn
+
+
+def _connect():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            pool = ConnectionPool(_open, size=JOURNAL_POOL_SIZE)
+            conn = pool.acquire()
+            try:
+                conn.cursor().execute(JOURNAL_SCHEMA)
+                conn.commit()
+            finally:
+                conn.close()
+            _pool = pool
+    return _pool.acquire()
+
+
+def add_entry(user_id, client_ref, task_text, due_date, is_completed):
+    return {"user_id": user_id, "op": "add", "client_ref": client_ref,
+            "task_text": task_text, "due_date": due_date, "is_completed": is_completed}
+
+
+def update_entry(user_id, task_id, task_text, due_date, is_completed, client_ref=None):
+    return {"user_id": user_id, "op": "update", "task_id": task_id, "client_ref": client_ref,
+            "task_text": task_text, "due_date": due_date, "is_completed": is_completed}
+
+
+def delete_entry(user_id, task_id, client_ref=None):
+    return {"user_id": user_id, "op": "delete", "task_id": task_id, "client_ref": client_ref}
+
+
+def append_entries(entries):
+    """Append entries in one transaction (one fsync); True once they are on disk."""
+    try:
+        conn = _connect()
+    except sqlite3.Error as err:
+        print(f"Task journal error: {err}")
+        return False
+    try:
+        placeholders = ", ".join(["%s"] * len(FIELDS))
+        conn.cursor().executemany(
+            f"INSERT INTO journal ({', '.join(FIELDS)}) VALUES ({placeholders})",
+            [tuple(entry.get(field) for field in FIELDS) for entry in entries]
+        )
+        conn.commit()
+        return True
+    except sqlite3.Error as err:
+        print(f"Task journal error: {err}")
+        return False
+    finally:
+        conn.close()
+
+
+def pending_entries(user_id):
+    """Entries for user_id not yet on the server, oldest first."""
+    try:
+        conn = _connect()
+    except sqlite3.Error as err:
+        print(f"Task journal error: {err}")
+        return []
+    try:
+        cursor = conn.cursor(dictionary=True)
+        cursor.execute("SELECT * FROM journal WHERE user_id = %s ORDER BY seq", (user_id,))
+        return cursor.fetchall()
+    except sqlite3.Error as err:
+        print(f"Task journal error: {err}")
+        return []
+    finally:
+        conn.close()
+
+
+def replay_journal(limit=REPLAY_BATCH_SIZE):
+    """Send the oldest entries to the server and drop them once committed there.
+
+    Returns ({client_ref: task_id} for replayed adds, more_waiting), or None
+    if the server couldn't take the batch; the entries then stay queued.
+    """
+    try:
+        conn = _connect()
+    except sqlite3.Error as err:
+        print(f"Task journal error: {err}")
+        return None
+    try:
+        cursor = conn.cursor(dictionary=True)
+        cursor.execute("SELECT * FROM journal ORDER BY seq LIMIT %s", (limit,))
+        entries = cursor.fetchall()
+        if not entries:
+            return {}, False
+        added = apply_task_journal(entries)
+        if added is None:
+            return None
+        # If this delete is lost the batch is simply replayed again, which
+        # apply_task_journal tolerates.
+        cursor.execute("DELETE FROM journal WHERE seq <= %s", (entries[-1]["seq"],))
+        conn.commit()
+        refs = {entry["client_ref"]: added[entry["seq"]] for entry in entries if entry["op"] == "add"}
+        return refs, len(entries) == limit
+    except sqlite3.Error as err:
+        print(f"Task journal error: {err}")
+        return None
+    finally:
+        conn.close()
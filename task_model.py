@@ -0,0 +1,374 @@
+from PySide6.QtWidgets import QStyledItemDelegate, QStyle, QStyleOptionButton, QApplication, QLineEdit, QDateEdit
+from PySide6.QtCore import Qt, QAbstractListModel, QModelIndex, QDate, QLocale, QRect, QSize, QEvent, Signal
+from PySide6.QtGui import QColor, QPen, QPainter
+from styles import URGENCY_COLORS, set_style_property
+
+TaskIdRole = Qt.UserRole + 1
+DueDateRole = Qt.UserRole + 2
+PendingRole = Qt.UserRole + 3
+
+ROW_HEIGHT = 38
+ROW_SPACING = 5
+CHECK_WIDTH = 24
+DATE_WIDTH = 100
+DELETE_WIDTH = 28
+
+
+def parse_date(date_value):
+    """Handle different date formats from database"""
+    if isinstance(date_value, QDate):
+        return date_value
+    if isinstance(date_value, str):
+        date = QDate.fromString(date_value, "yyyy-MM-dd")
+        if not date.isValid():
+            date = QDate.fromString(date_value, Qt.ISODate)
+        return date if date.isValid() else QDate.currentDate()
+    elif hasattr(date_value, 'year'):
+        return QDate(date_value.year, date_value.month, date_value.day)
+    return QDate.currentDate()
+
+
+def task_urgency(task, today=None):
+    if task["is_completed"]:
+        return "done"
+    days_remaining = (today or QDate.currentDate()).daysTo(task["due_date"])
+    if days_remaining < 0:
+        return "overdue"
+    if days_remaining == 0:
+        return "today"
+    if days_remaining <= 7:
+        return "week"
+    return "later"
+
+
+class TaskListModel(QAbstractListModel):
+    """Tasks as plain dicts; rows are painted by TaskDelegate, no per-row widgets.
+
+    Rows arrive in keyset pages: the view calls fetchMore() as it scrolls near
+    the end, which emits more_requested(after_task_id) for the owner to load
+    and hand back through append_page(). When the local task cache has the
+    user's rows they arrive as a single page instead, and the server's
+    changes since then are folded in with apply_changes().
+
+    total/completed cover every task the user has, not just the loaded pages:
+    they start from a server-side aggregate (add_counts) and are adjusted by
+    each add, delete and toggle, so progress never needs a row scan.
+    """
+    task_edited = Signal(object)
+    more_requested = Signal(int)
+    counts_changed = Signal()
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.tasks = []
+        self.reset_paging()
+
+    def reset_paging(self):
+        self.beginResetModel()
+        self.tasks = []
+        self.paged_rows = 0
+        self.after_task_id = 0
+        self.exhausted = False
+        self.loading = False
+        self.total = 0
+        self.completed = 0
+        self.count_pages = False
+        self.endResetModel()
+        self.counts_changed.emit()
+
+    def add_counts(self, total, completed):
+        self.total += total
+        self.completed += completed
+        self.counts_changed.emit()
+
+    def count_loaded_pages(self):
+        # Fallback when the aggregate couldn't be fetched: count the rows we
+        # have paged in so far, and every page from here on.
+        self.count_pages = True
+        paged = self.tasks[:self.paged_rows]
+        self.add_counts(len(paged), sum(1 for task in paged if task["is_completed"]))
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and not self.exhausted and not self.loading
+
+    def fetchMore(self, parent=QModelIndex()):
+        if self.canFetchMore(parent):
+            self.loading = True
+            self.more_requested.emit(self.after_task_id)
+
+    def append_page(self, rows, page_size):
+        self.loading = False
+        self.exhausted = len(rows) < page_size
+        if rows:
+            self.after_task_id = rows[-1]["task_id"]
+        # Tasks added locally since paging started sit after the paged rows
+        # and may show up again in a later page; skip those.
+        local_ids = {task["task_id"] for task in self.tasks[self.paged_rows:]}
+        page = [
+            self.make_task(row["task_id"], row["task_text"], row["due_date"], row["is_completed"])
+            for row in rows if row["task_id"] not in local_ids
+        ]
+        self._insert_paged(page)
+        if page and self.count_pages:
+            self.add_counts(len(page), sum(1 for task in page if task["is_completed"]))
+
+    def _insert_paged(self, page):
+        if page:
+            first = self.paged_rows
+            self.beginInsertRows(QModelIndex(), first, first + len(page) - 1)
+            self.tasks[first:first] = page
+            self.paged_rows += len(page)
+            self.endInsertRows()
+
+    def page_failed(self):
+        # Stop here rather than letting the view retry on every scroll.
+        self.loading = False
+        self.exhausted = True
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.tasks)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        task = self.tasks[index.row()]
+        if role in (Qt.DisplayRole, Qt.EditRole):
+            return task["task_text"]
+        if role == Qt.CheckStateRole:
+            return Qt.Checked if task["is_completed"] else Qt.Unchecked
+        if role == DueDateRole:
+            return task["due_date"]
+        if role == TaskIdRole:
+            return task["task_id"]
+        if role == PendingRole:
+            return task["task_id"] is None
+        return None
+
+    def flags(self, index):
+        flags = super().flags(index)
+        if index.isValid():
+            flags |= Qt.ItemIsEditable | Qt.ItemIsUserCheckable
+        return flags
+
+    def setData(self, index, value, role=Qt.EditRole):
+        if not index.isValid():
+            return False
+        task = self.tasks[index.row()]
+        if role == Qt.EditRole:
+            if value == task["task_text"]:
+                return False
+            task["task_text"] = value
+        elif role == Qt.CheckStateRole:
+            is_completed = Qt.CheckState(value) == Qt.Checked
+            if is_completed == task["is_completed"]:
+                return False
+            task["is_completed"] = is_completed
+            self.add_counts(0, 1 if is_completed else -1)
+        elif role == DueDateRole:
+            if value == task["due_date"]:
+                return False
+            task["due_date"] = value
+        else:
+            return False
+        self.dataChanged.emit(index, index, [role])
+        self.task_edited.emit(task)
+        return True
+
+    def make_task(self, task_id, task_text, due_date, is_completed):
+        return {
+            "task_id": task_id,
+            "task_text": task_text,
+            "due_date": parse_date(due_date),
+            "is_completed": bool(is_completed),
+        }
+
+    def append_task(self, task):
+        row = len(self.tasks)
+        self.beginInsertRows(QModelIndex(), row, row)
+        self.tasks.append(task)
+        self.endInsertRows()
+        self.add_counts(1, 1 if task["is_completed"] else 0)
+        return task
+
+    def row_of(self, task):
+        for row, candidate in enumerate(self.tasks):
+            if candidate is task:
+                return row
+        return -1
+
+    def remove_task(self, task):
+        row = self.row_of(task)
+        if row < 0:
+            return False
+        self.beginRemoveRows(QModelIndex(), row, row)
+        del self.tasks[row]
+        if row < self.paged_rows:
+            self.paged_rows -= 1
+        self.add_counts(-1, -1 if task["is_completed"] else 0)
+        self.endRemoveRows()
+        return True
+
+    def task_changed(self, task):
+        row = self.row_of(task)
+        if row >= 0:
+            index = self.index(row)
+            self.dataChanged.emit(index, index)
+
+    def tasks_changed(self, tasks):
+        """task_changed() for many tasks in one pass over the rows."""
+        wanted = {id(task) for task in tasks}
+        for row, task in enumerate(self.tasks):
+            if id(task) in wanted:
+                index = self.index(row)
+                self.dataChanged.emit(index, index)
+
+    def apply_changes(self, rows, deleted_ids, insert_missing=True):
+        """Fold a server delta into the loaded rows: update or add changed tasks, drop deleted ones."""
+        by_id = {task["task_id"]: task for task in self.tasks if task["task_id"] is not None}
+        for task_id in deleted_ids:
+            task = by_id.pop(task_id, None)
+            if task is not None:
+                self.remove_task(task)
+
+        added = []
+        for row in rows:
+            fresh = self.make_task(row["task_id"], row["task_text"], row["due_date"], row["is_completed"])
+            task = by_id.get(fresh["task_id"])
+            if task is None:
+                if insert_missing:
+                    added.append(fresh)
+                continue
+            if fresh == task:
+                continue
+            if fresh["is_completed"] != task["is_completed"]:
+                self.add_counts(0, 1 if fresh["is_completed"] else -1)
+            task.update(fresh)
+            self.task_changed(task)
+
+        added.sort(key=lambda task: task["task_id"])
+        self._insert_paged(added)
+        if added:
+            self.add_counts(len(added), sum(1 for task in added if task["is_completed"]))
+
+    def assign_task_id(self, client_ref, task_id):
+        """Give a pending task its server id once the journal replay has inserted it."""
+        pending = next((task for task in self.tasks
+                        if task["task_id"] is None and task.get("client_ref") == client_ref), None)
+        if pending is None:
+            return
+        if any(task["task_id"] == task_id for task in self.tasks):
+            # Already loaded from the server (an earlier replay was cut short
+            # before it cleared the journal); drop the pending copy.
+            self.remove_task(pending)
+            return
+        pending["task_id"] = task_id
+        self.task_changed(pending)
+
+
+class TaskDelegate(QStyledItemDelegate):
+    """Paints task rows and creates a single text or date editor on demand."""
+    delete_requested = Signal(object)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.edit_part = "text"
+
+    def part_rects(self, rect):
+        rect = rect.adjusted(0, ROW_SPACING // 2, 0, -ROW_SPACING // 2)
+        inner = rect.adjusted(5, 0, -5, 0)
+        check = QRect(inner.left(), inner.top(), CHECK_WIDTH, inner.height())
+        delete = QRect(inner.right() - DELETE_WIDTH + 1, inner.top(), DELETE_WIDTH, inner.height())
+        date = QRect(delete.left() - DATE_WIDTH - 5, inner.top() + 5, DATE_WIDTH, inner.height() - 10)
+        text = QRect(check.right() + 5, inner.top(), date.left() - check.right() - 10, inner.height())
+        return rect, check, text, date, delete
+
+    def sizeHint(self, option, index):
+        return QSize(0, ROW_HEIGHT)
+
+    def paint(self, painter, option, index):
+        task = index.model().tasks[index.row()]
+        rect, check, text, date, delete = self.part_rects(option.rect)
+        background, border = URGENCY_COLORS[task_urgency(task)]
+
+        painter.save()
+        painter.setRenderHint(QPainter.Antialiasing)
+        painter.setBrush(background)
+        painter.setPen(QPen(border, 1) if border else Qt.NoPen)
+        painter.drawRoundedRect(rect.adjusted(0, 0, -1, -1), 5, 5)
+
+        check_option = QStyleOptionButton()
+        check_option.rect = QRect(check.left(), check.center().y() - 8, 16, 16)
+        check_option.state = QStyle.State_Enabled | (QStyle.State_On if task["is_completed"] else QStyle.State_Off)
+        QApplication.style().drawPrimitive(QStyle.PE_IndicatorCheckBox, check_option, painter)
+
+        text_color = QColor("black") if task["task_id"] is not None else QColor("gray")
+        painter.setPen(text_color)
+        elided = option.fontMetrics.elidedText(task["task_text"], Qt.ElideRight, text.width())
+        painter.drawText(text, Qt.AlignVCenter | Qt.AlignLeft, elided)
+
+        painter.setBrush(QColor("white"))
+        painter.setPen(QColor("#5A7EC9"))
+        painter.drawRoundedRect(date, 5, 5)
+        painter.setPen(text_color)
+        painter.drawText(date, Qt.AlignCenter, QLocale().toString(task["due_date"], QLocale.ShortFormat))
+
+        painter.drawText(delete, Qt.AlignCenter, "🗑️")
+        painter.restore()
+
+    def editorEvent(self, event, model, option, index):
+        if event.type() != QEvent.MouseButtonRelease or not (index.flags() & Qt.ItemIsEditable):
+            return False
+        rect, check, text, date, delete = self.part_rects(option.rect)
+        pos = event.position().toPoint()
+        task = model.tasks[index.row()]
+        if check.contains(pos):
+            model.setData(index, Qt.Unchecked if task["is_completed"] else Qt.Checked, Qt.CheckStateRole)
+            return True
+        if delete.contains(pos):
+            self.delete_requested.emit(task)
+            return True
+        view = option.widget
+        if view is not None and (text.contains(pos) or date.contains(pos)):
+            self.edit_part = "date" if date.contains(pos) else "text"
+            view.edit(index)
+            return True
+        return False
+
+    def createEditor(self, parent, option, index):
+        # Editors carry no stylesheet of their own; they are styled by the
+        # window-level rules in styles.MAIN_WINDOW_STYLE.
+        if self.edit_part == "date":
+            editor = QDateEdit(parent)
+            editor.setObjectName("taskDateEditor")
+            editor.setCalendarPopup(True)
+            editor.dateChanged.connect(lambda: self.commitData.emit(editor))
+        else:
+            editor = QLineEdit(parent)
+            editor.setObjectName("taskTextEditor")
+            # Commit while typing so the write-behind queue sees every edit,
+            # as the old per-row QLineEdit did.
+            editor.textEdited.connect(lambda: self.commitData.emit(editor))
+        editor.edit_part = self.edit_part
+        return editor
+
+    def setEditorData(self, editor, index):
+        # Loading the current value must not echo back as an edit.
+        editor.blockSignals(True)
+        if editor.edit_part == "date":
+            editor.setDate(index.data(DueDateRole))
+            # Also runs when the row is repainted at an urgency boundary.
+            set_style_property(editor, "urgency", task_urgency(index.model().tasks[index.row()]))
+        else:
+            editor.setText(index.data(Qt.EditRole))
+        editor.blockSignals(False)
+
+    def setModelData(self, editor, model, index):
+        if editor.edit_part == "date":
+            model.setData(index, editor.date(), DueDateRole)
+            set_style_property(editor, "urgency", task_urgency(model.tasks[index.row()]))
+        else:
+            model.setData(index, editor.text(), Qt.EditRole)
+
+    def updateEditorGeometry(self, editor, option, index):
+        rect, check, text, date, delete = self.part_rects(option.rect)
+        editor.setGeometry(date if editor.edit_part == "date" else text)
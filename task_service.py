@@ -0,0 +1,97 @@
+"""Task operations for one user, with no Qt: the task window, task_cli.py and load tests all go through here.
+
+A journaled TaskService (the GUI's) appends its writes to the local task
+journal and leaves them to task_sync to replay. An unjournaled one sends
+them straight to the server, which is what scripts and load tests want:
+thousands of simulated users sharing one local journal file would measure
+the file, not the server. Either way the writes end up in
+database.apply_task_journal and are applied the same way.
+
+Every method blocks; the GUI calls them through db_async.
+"""
+import uuid
+from database import get_task, get_user_tasks_page, get_task_stats, query_tasks, apply_task_journal, TASK_PAGE_SIZE
+from task_cache import load_cached_tasks, sync_task_cache
+from task_journal import append_entries, pending_entries, add_entry, update_entry, delete_entry
+
+
+def progress_percent(total, completed):
+    if total <= 0:
+        return 0
+    return int((completed / total) * 100)
+
+
+class TaskService:
+    def __init__(self, user_id, journaled=True):
+        self.user_id = user_id
+        self.journaled = journaled
+
+    def _write(self, entries):
+        """{seq: task_id} for the adds once the entries are safe, or None.
+
+        Journaled, "safe" means on disk locally and the adds have no task_id
+        yet; otherwise it means committed on the server.
+        """
+        if self.journaled:
+            return {} if append_entries(entries) else None
+        for seq, entry in enumerate(entries):
+            entry["seq"] = seq
+        return apply_task_journal(entries)
+
+    def add(self, task_text, due_date, is_completed=0, client_ref=None):
+        """Add a task; returns it as a row (task_id None until synced, if journaled), or None."""
+        entry = add_entry(self.user_id, client_ref or uuid.uuid4().hex, task_text, due_date, is_completed)
+        added = self._write([entry])
+        if added is None:
+            return None
+        return {"task_id": added.get(entry.get("seq")), "client_ref": entry["client_ref"],
+                "task_text": task_text, "due_date": due_date, "is_completed": is_completed}
+
+    def update(self, task_id, task_text, due_date, is_completed):
+        return self.update_many([(task_id, task_text, due_date, is_completed)])
+
+    def update_many(self, rows):
+        """Write (task_id, text, due_date, is_completed[, client_ref]) rows in one batch; True once they are safe.
+
+        A task added through this journal but not synced yet has no task_id;
+        give its client_ref instead.
+        """
+        return self._write([update_entry(self.user_id, *row) for row in rows]) is not None
+
+    def complete(self, task, completed=True):
+        """Mark a task row (from get(), add() or list()) done, or not done."""
+        return self.update(task["task_id"], task["task_text"], task["due_date"], 1 if completed else 0)
+
+    def delete(self, task_id, client_ref=None):
+        return self._write([delete_entry(self.user_id, task_id, client_ref)]) is not None
+
+    def get(self, task_id):
+        return get_task(self.user_id, task_id)
+
+    def list(self, text="", status=None, due_from=None, due_to=None, sort="created",
+             after=None, limit=TASK_PAGE_SIZE):
+        """One page of tasks matching a search; see database.query_tasks."""
+        return query_tasks(self.user_id, text=text, status=status, due_from=due_from, due_to=due_to,
+                           sort=sort, after=after, limit=limit)
+
+    def page(self, after_task_id=0, limit=TASK_PAGE_SIZE):
+        return get_user_tasks_page(self.user_id, after_task_id, limit)
+
+    def stats(self):
+        """(total, completed), or None if the server couldn't be asked."""
+        return get_task_stats(self.user_id)
+
+    def progress(self):
+        stats = self.stats()
+        return None if stats is None else progress_percent(*stats)
+
+    def cached(self):
+        """(rows, watermark) from the local task cache; watermark is None on a miss."""
+        return load_cached_tasks(self.user_id)
+
+    def sync_cache(self, watermark):
+        return sync_task_cache(self.user_id, watermark)
+
+    def pending(self):
+        """Journaled writes not yet on the server, oldest first."""
+        return pending_entries(self.user_id)
@@ -0,0 +1,91 @@
+from PySide6.QtCore import QObject, QTimer, Signal
+from task_journal import replay_journal
+import db_async
+
+SYNC_RETRY_MS = 1000
+SYNC_MAX_RETRY_MS = 60000
+
+
+class TaskSync(QObject):
+    """Appends task writes to the local journal and replays it to the server in the background.
+
+    A write is safe once its journal append has landed, whatever the server
+    is doing. Replays run one at a time; while the server is unreachable
+    they back off exponentially up to SYNC_MAX_RETRY_MS.
+    """
+    task_added = Signal(str, int)
+    online_changed = Signal(bool)
+    # Every write journaled before this replay started is on the server.
+    synced = Signal()
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.online = True
+        self.stopped = False
+        self.replaying = False
+        self.replay_again = False
+        self.retry_ms = SYNC_RETRY_MS
+        self.retry_timer = QTimer(self)
+        self.retry_timer.setSingleShot(True)
+        self.retry_timer.timeout.connect(self.replay)
+
+    def record(self, write, *args):
+        """Run a journaling write (a TaskService method) on the local writer thread.
+
+        The returned DbCall yields the write's result; a replay follows once
+        it has landed.
+        """
+        return db_async.submit(write, *args, local=True).then(
+            lambda saved: self.replay_soon() if saved else None
+        )
+
+    def replay_soon(self):
+        # While backing off, new writes wait for the retry instead of
+        # hammering a server that is down.
+        if not self.retry_timer.isActive():
+            self.replay()
+
+    def stop(self):
+        """Replay no more; whatever is left stays in the journal for the next TaskSync."""
+        self.stopped = True
+        self.retry_timer.stop()
+
+    def replay(self):
+        if self.stopped:
+            return
+        if self.replaying:
+            self.replay_again = True
+            return
+        self.replaying = True
+        self.replay_again = False
+        # On the serial writer thread, so replays reach the server in order
+        # with the task list's stats and cache syncs.
+        db_async.submit(replay_journal, serial=True).then(
+            self.replayed,
+            lambda error: self.replayed(None)
+        )
+
+    def replayed(self, result):
+        self.replaying = False
+        if self.stopped:
+            return
+        if result is None:
+            self.set_online(False)
+            self.retry_timer.start(self.retry_ms)
+            self.retry_ms = min(self.retry_ms * 2, SYNC_MAX_RETRY_MS)
+            return
+
+        self.set_online(True)
+        self.retry_ms = SYNC_RETRY_MS
+        added, more_waiting = result
+        for client_ref, task_id in added.items():
+            self.task_added.emit(client_ref, task_id)
+        if more_waiting or self.replay_again:
+            self.replay()
+        else:
+            self.synced.emit()
+
+    def set_online(self, online):
+        if online != self.online:
+            self.online = online
+            self.online_changed.emit(online)
@@ -0,0 +1,156 @@
+import os
+from collections import OrderedDict
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, QRect, Qt, Signal, Slot
+from PySide6.QtGui import QImageReader, QPixmap
+
+THEME_FILES = {
+    "theme0": ("images/theme0.jpg", "music/m0.mp3"),
+    "theme1": ("images/theme1.jpg", "music/m1.mp3"),
+    "theme2": ("images/theme2.jpg", "music/m2.mp3"),
+    "theme3": ("images/theme3.jpg", "music/m3.mp3")
+}
+# Same unit as QPixmapCache.cacheLimit(); a 736x413 background is ~1.2 MB.
+THEME_CACHE_LIMIT_KB = 10 * 1024
+
+_cache = OrderedDict()
+_pending = set()
+_tracks = {}
+_pool = None
+_loader = None
+
+
+def decode_image(path, size):
+    """Decode path scaled to cover size (centre-cropped); safe off the GUI thread."""
+    reader = QImageReader(path)
+    source = reader.size()
+    if source.isValid():
+        # Let the decoder scale while reading instead of decoding full size first.
+        scaled = source.scaled(size, Qt.KeepAspectRatioByExpanding)
+        reader.setScaledSize(scaled)
+        reader.setScaledClipRect(QRect(
+            (scaled.width() - size.width()) // 2,
+            (scaled.height() - size.height()) // 2,
+            size.width(),
+            size.height()
+        ))
+    image = reader.read()
+    if image.isNull():
+        print(f"Could not load theme image {path}: {reader.errorString()}")
+    return image
+
+
+class _ThemeLoader(QObject):
+    # Emitted from the worker; self lives on the GUI thread, so _store runs there.
+    _decoded = Signal(object, object)
+    _track_read = Signal(str, object)
+
+    def __init__(self):
+        super().__init__()
+        self._decoded.connect(self._store)
+        self._track_read.connect(self._store_track)
+
+    @Slot(object, object)
+    def _store(self, key, image):
+        _pending.discard(key)
+        if key not in _cache and not image.isNull():
+            _put(key, QPixmap.fromImage(image))
+
+    @Slot(str, object)
+    def _store_track(self, path, data):
+        _tracks[path] = data
+
+
+class _DecodeRunnable(QRunnable):
+    def __init__(self, key, path, size):
+        super().__init__()
+        self.key = key
+        self.path = path
+        self.size = size
+
+    def run(self):
+        _loader._decoded.emit(self.key, decode_image(self.path, self.size))
+
+
+class _TrackRunnable(QRunnable):
+    def __init__(self, path):
+        super().__init__()
+        self.path = path
+
+    def run(self):
+        try:
+            with open(self.path, "rb") as f:
+                data = f.read()
+        except OSError as e:
+            print(f"Could not load theme track {self.path}: {e}")
+            data = None
+        _loader._track_read.emit(self.path, data)
+
+
+def _key(theme, size):
+    return theme, (size.width(), size.height())
+
+
+def _put(key, pixmap):
+    _cache[key] = pixmap
+    _cache.move_to_end(key)
+    limit = THEME_CACHE_LIMIT_KB * 1024
+    while len(_cache) > 1 and sum(_cost(p) for p in _cache.values()) > limit:
+        _cache.popitem(last=False)
+
+
+def _cost(pixmap):
+    return pixmap.width() * pixmap.height() * pixmap.depth() // 8
+
+
+def _worker():
+    global _pool, _loader
+    if _pool is None:
+        _loader = _ThemeLoader()
+        _pool = QThreadPool()
+        _pool.setMaxThreadCount(1)
+    return _pool
+
+
+def preload(size, themes=None):
+    """Decode theme backgrounds for size on a background thread."""
+    pool = _worker()
+    for theme in themes or THEME_FILES:
+        key = _key(theme, size)
+        if key in _cache or key in _pending:
+            continue
+        _pending.add(key)
+        pool.start(_DecodeRunnable(key, THEME_FILES[theme][0], size))
+
+
+def preload_tracks(themes=None):
+    """Read the theme tracks into memory on a background thread."""
+    pool = _worker()
+    for theme in themes or THEME_FILES:
+        path = THEME_FILES[theme][1]
+        if path in _tracks:
+            continue
+        # None marks the read as queued; a missing file also ends up as None.
+        _tracks[path] = None
+        # Tracks are optional; a theme without one just plays nothing.
+        if os.path.isfile(path):
+            pool.start(_TrackRunnable(path))
+
+
+def pixmap(theme, size):
+    """Background for theme at size, from the cache or decoded now if not preloaded yet."""
+    key = _key(theme, size)
+    if key not in _cache:
+        _put(key, QPixmap.fromImage(decode_image(THEME_FILES[theme][0], size)))
+    _cache.move_to_end(key)
+    return _cache[key]
+
+
+def track_data(path):
+    """Prefetched bytes of a theme track, or None if not read (yet)."""
+    return _tracks.get(path)
+
+
+def shutdown(timeout_ms=-1):
+    if _pool is None:
+        return True
+    return _pool.waitForDone(timeout_ms)
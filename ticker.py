@@ -0,0 +1,120 @@
+"""One shared timer for every periodic refresh in the UI.
+
+subscribe(callback, seconds) calls callback on the wall-clock multiples of
+`seconds` (every whole second, every whole minute, ...), so subscribers
+that fall due together share one wakeup, and a clock changes the moment
+the second does rather than at whatever phase its timer started.
+
+A subscription tied to a widget pauses while the widget can't be seen:
+its window hidden or minimized, or the whole application hidden. It is
+called once as soon as the widget shows again, so nothing is left stale.
+Pass hidden_seconds to keep ticking at that slower rate instead.
+"""
+from PySide6.QtCore import QObject, QTimer, QEvent, QDateTime, Qt
+from PySide6.QtGui import QGuiApplication
+
+_hub = None
+
+
+class Subscription(QObject):
+    def __init__(self, hub, callback, seconds, widget, hidden_seconds):
+        super().__init__(hub)
+        self.hub = hub
+        self.callback = callback
+        self.seconds = seconds
+        self.widget = widget
+        self.hidden_seconds = hidden_seconds
+        self.shown = widget is None or widget.isVisible()
+        self.next_due = None
+
+    def period_ms(self):
+        seconds = self.seconds if self.shown and self.hub.app_shown else self.hidden_seconds
+        return None if seconds is None else int(seconds * 1000)
+
+    def schedule(self, now):
+        period = self.period_ms()
+        self.next_due = None if period is None else (now // period + 1) * period
+
+    def cancel(self):
+        self.hub.remove(self)
+
+
+class _TickHub(QObject):
+    def __init__(self):
+        super().__init__()
+        self.subscriptions = []
+        self.app_shown = True
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        # A coarse timer may fire up to 5% early or late, which would put a
+        # clock visibly off the second.
+        self.timer.setTimerType(Qt.PreciseTimer)
+        self.timer.timeout.connect(self.tick)
+        QGuiApplication.instance().applicationStateChanged.connect(self.application_state_changed)
+
+    def add(self, subscription):
+        self.subscriptions.append(subscription)
+        if subscription.widget is not None:
+            subscription.widget.installEventFilter(self)
+            # A slot of a QObject rather than a lambda, so Qt drops the
+            # connection if the hub goes first at exit.
+            subscription.widget.destroyed.connect(subscription.cancel)
+        subscription.schedule(QDateTime.currentMSecsSinceEpoch())
+        self.arm()
+
+    def remove(self, subscription):
+        if subscription in self.subscriptions:
+            self.subscriptions.remove(subscription)
+            self.arm()
+
+    def eventFilter(self, obj, event):
+        # Minimizing a window sends its widgets spontaneous Hide events
+        # (isVisible() stays True), and restoring it sends Show.
+        if event.type() in (QEvent.Show, QEvent.Hide):
+            shown = event.type() == QEvent.Show
+            for subscription in self.subscriptions:
+                if subscription.widget is obj and subscription.shown != shown:
+                    subscription.shown = shown
+                    self.visibility_changed(subscription)
+        return False
+
+    def application_state_changed(self, state):
+        shown = state not in (Qt.ApplicationHidden, Qt.ApplicationSuspended)
+        if shown != self.app_shown:
+            self.app_shown = shown
+            for subscription in list(self.subscriptions):
+                self.visibility_changed(subscription)
+
+    def visibility_changed(self, subscription):
+        if subscription.shown and self.app_shown:
+            subscription.callback()
+        subscription.schedule(QDateTime.currentMSecsSinceEpoch())
+        self.arm()
+
+    def arm(self):
+        due = [s.next_due for s in self.subscriptions if s.next_due is not None]
+        if not due:
+            self.timer.stop()
+            return
+        self.timer.start(max(0, min(due) - QDateTime.currentMSecsSinceEpoch()))
+
+    def tick(self):
+        now = QDateTime.currentMSecsSinceEpoch()
+        for subscription in list(self.subscriptions):
+            if subscription.next_due is not None and subscription.next_due <= now:
+                subscription.schedule(now)
+                try:
+                    subscription.callback()
+                except Exception as e:
+                    print(f"Tick callback failed: {e}")
+        self.arm()
+
+
+def subscribe(callback, seconds=1, widget=None, hidden_seconds=None):
+    """Call callback() every `seconds`, on the wall-clock boundary; returns a Subscription to cancel()."""
+    global _hub
+    if _hub is None:
+        _hub = _TickHub()
+    subscription = Subscription(_hub, callback, seconds, widget, hidden_seconds)
+    _hub.add(subscription)
+    return subscription
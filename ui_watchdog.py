@@ -0,0 +1,145 @@
+"""Event-loop watchdog: finds GUI freezes and the code that caused them.
+
+A precise PROBE_MS timer ticks on the GUI thread. When a tick comes late by
+more than the budget, the event loop was blocked that long. Meanwhile a
+sampler thread checks every SAMPLE_MS whether the next tick is overdue and,
+if so, records the main thread's Python stack; the samples taken during a
+stall say where the GUI thread was stuck. Each stall over budget is
+appended to the report file with its most frequent stack, and the
+innermost SakuDo frame of that stack is named as the culprit.
+
+Opt in with main.py --watchdog. SAKU_WATCHDOG_BUDGET_MS (default 50) sets
+the budget and SAKU_WATCHDOG_REPORT (default stalls.log) the report file.
+
+The sampler needs the GIL to look. Python code hands it over every few
+milliseconds, and most Qt and database calls release it, but a C call that
+holds it throughout (bcrypt without its GIL release, say) is only seen
+after it returns.
+"""
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import Counter
+from PySide6.QtCore import QObject, QTimer, Qt
+
+BUDGET_MS = float(os.environ.get("SAKU_WATCHDOG_BUDGET_MS", "50"))
+REPORT_PATH = os.environ.get("SAKU_WATCHDOG_REPORT", "stalls.log")
+PROBE_MS = 5
+SAMPLE_MS = 10
+STACK_DEPTH = 30
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+class EventLoopWatchdog(QObject):
+    def __init__(self, budget_ms=BUDGET_MS, report_path=REPORT_PATH, parent=None):
+        super().__init__(parent)
+        self.budget = budget_ms / 1000
+        self.report_path = report_path
+        self.stalls = []
+        self.main_thread = threading.main_thread().ident
+        self.lock = threading.Lock()
+        # (tick the sample was waiting after, stack) pairs.
+        self.samples = []
+        self.ticks = 0
+        self.last_tick = time.perf_counter()
+        self.running = False
+        self.probe = QTimer(self)
+        self.probe.setTimerType(Qt.PreciseTimer)
+        self.probe.setInterval(PROBE_MS)
+        self.probe.timeout.connect(self.tick)
+        self.sampler = None
+
+    def start(self):
+        self.running = True
+        self.last_tick = time.perf_counter()
+        self.probe.start()
+        self.sampler = threading.Thread(target=self.sample_loop, name="watchdog-sampler", daemon=True)
+        self.sampler.start()
+
+    def stop(self):
+        self.running = False
+        self.probe.stop()
+        if self.sampler is not None:
+            self.sampler.join()
+            self.sampler = None
+
+    def tick(self):
+        now = time.perf_counter()
+        late = now - self.last_tick - PROBE_MS / 1000
+        with self.lock:
+            samples = [stack for tick, stack in self.samples if tick == self.ticks]
+            self.samples = []
+            self.ticks += 1
+            self.last_tick = now
+        if late >= self.budget:
+            self.record_stall(late, samples)
+
+    def sample_loop(self):
+        while self.running:
+            time.sleep(SAMPLE_MS / 1000)
+            with self.lock:
+                tick = self.ticks
+                overdue = time.perf_counter() - self.last_tick - PROBE_MS / 1000
+            if overdue < SAMPLE_MS / 1000:
+                continue
+            frame = sys._current_frames().get(self.main_thread)
+            if frame is None:
+                continue
+            # Innermost first; source lines are only looked up for the report.
+            stack = traceback.StackSummary.extract(traceback.walk_stack(frame), limit=STACK_DEPTH,
+                                                   lookup_lines=False)
+            del frame
+            with self.lock:
+                if tick == self.ticks:
+                    self.samples.append((tick, tuple((f.filename, f.lineno, f.name) for f in stack)))
+
+    def record_stall(self, seconds, samples):
+        stack, hits = Counter(samples).most_common(1)[0] if samples else ((), 0)
+        stall = {
+            "at": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "ms": seconds * 1000,
+            "samples": len(samples),
+            "hits": hits,
+            "culprit": culprit(stack),
+            "stack": stack,
+        }
+        self.stalls.append(stall)
+        self.write(stall)
+
+    def write(self, stall):
+        lines = [f"{stall['at']}  stall {stall['ms']:.0f} ms (budget {self.budget * 1000:.0f} ms), "
+                 f"culprit {stall['culprit'] or 'unknown'}"]
+        if stall["stack"]:
+            lines.append(f"  main thread stack in {stall['hits']} of {stall['samples']} samples, innermost last:")
+            for filename, lineno, name in reversed(stall["stack"]):
+                lines.append(f"    {os.path.relpath(filename, APP_DIR)}:{lineno} in {name}")
+        else:
+            lines.append("  no samples; the stall held the GIL or was shorter than one sample")
+        try:
+            with open(self.report_path, "a", encoding="utf-8") as f:
+                f.write("\n".join(lines) + "\n\n")
+        except OSError as e:
+            print(f"Could not write stall report: {e}")
+
+    def summary(self):
+        if not self.stalls:
+            return f"No event-loop stalls over {self.budget * 1000:.0f} ms"
+        worst = max(stall["ms"] for stall in self.stalls)
+        total = sum(stall["ms"] for stall in self.stalls)
+        blamed = Counter(stall["culprit"] or "unknown" for stall in self.stalls)
+        top = ", ".join(f"{name} x{count}" for name, count in blamed.most_common(5))
+        return (f"{len(self.stalls)} event-loop stalls over {self.budget * 1000:.0f} ms, worst {worst:.0f} ms, "
+                f"{total:.0f} ms frozen in all; most blamed: {top}. Details in {self.report_path}")
+
+
+def culprit(stack):
+    """"file:function" of the innermost frame in SakuDo's own code, else the innermost frame."""
+    for filename, lineno, name in stack:
+        if os.path.dirname(os.path.abspath(filename)) == APP_DIR and not filename.endswith("ui_watchdog.py"):
+            return f"{os.path.basename(filename)}:{name}"
+    if stack:
+        filename, lineno, name = stack[0]
+        return f"{os.path.basename(filename)}:{name}"
+    return None
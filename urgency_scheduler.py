@@ -0,0 +1,173 @@
+"""Repaints task rows when their urgency changes, and raises due-day reminders.
+
+A row's colour (task_model.task_urgency) depends on today's date, so it
+changes at midnight: a week before the due date, on it, and the day after.
+UrgencyScheduler keeps every task of a TaskListModel in a min-heap keyed by
+its next such boundary and sleeps until the earliest one; waking, it
+repaints just the rows that crossed a boundary and files them under their
+next one. Optional reminders (SAKU_REMINDER_TIME, e.g. "09:00") come from
+the same heap: a task crossing into its due day gets one more entry for
+that time of day.
+
+Heap entries are never removed in place. A task that is edited, completed
+or deleted just gets a new entry (or none) in `current`, and the old one is
+skipped when it surfaces.
+"""
+import heapq
+import itertools
+import os
+from PySide6.QtCore import QObject, QTimer, QDateTime, QDate, QTime, Signal, Qt
+from task_model import DueDateRole
+
+# Timers run on a monotonic clock that may stand still while the machine
+# sleeps, so never sleep longer than this before checking the wall clock.
+MAX_WAIT_MS = 60 * 60 * 1000
+MINUTES_PER_DAY = 24 * 60
+WEEK_DAYS = 7
+# Compact the heap once stale entries outnumber live ones by this much.
+HEAP_SLACK = 256
+REMINDER_TIME = QTime.fromString(os.environ.get("SAKU_REMINDER_TIME", ""), "HH:mm")
+REMINDER_MINUTE = REMINDER_TIME.hour() * 60 + REMINDER_TIME.minute()
+
+RESTYLE = 0
+REMIND = 1
+
+
+def next_boundary(due, today):
+    """Day after today at whose midnight a pending task due on `due` changes urgency, or None.
+
+    Days are julian day numbers.
+    """
+    days = due - today
+    if days > WEEK_DAYS:
+        return due - WEEK_DAYS
+    if days >= 0:
+        # "week" turns "today" on the due date; "today" turns "overdue" the day after.
+        return due if days > 0 else due + 1
+    return None
+
+
+def _now():
+    # Heap times are local wall-clock minutes (julian day * 1440 + minute):
+    # a QDateTime per task would cost a time zone lookup each, and the
+    # boundaries are wall-clock times anyway.
+    now = QDateTime.currentDateTime()
+    return now, now.date().toJulianDay() * MINUTES_PER_DAY + now.time().hour() * 60 + now.time().minute()
+
+
+class UrgencyScheduler(QObject):
+    reminders_due = Signal(list)
+
+    def __init__(self, model, reminders=False, parent=None):
+        super().__init__(parent)
+        self.model = model
+        self.reminders = reminders and REMINDER_TIME.isValid()
+        self.heap = []
+        self.counter = itertools.count()
+        # (id(task), kind) -> the live heap entry for it.
+        self.current = {}
+        self.reminded = set()
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setTimerType(Qt.VeryCoarseTimer)
+        self.timer.timeout.connect(self.wake)
+        self.armed_for = None
+
+        model.rowsInserted.connect(self.rows_inserted)
+        model.rowsAboutToBeRemoved.connect(self.rows_removed)
+        model.modelReset.connect(self.clear)
+        model.dataChanged.connect(self.data_changed)
+
+    def rows_inserted(self, parent, first, last):
+        self.track(self.model.tasks[first:last + 1])
+
+    def rows_removed(self, parent, first, last):
+        for task in self.model.tasks[first:last + 1]:
+            self.current.pop((id(task), RESTYLE), None)
+            self.current.pop((id(task), REMIND), None)
+
+    def data_changed(self, top_left, bottom_right, roles=()):
+        # Text edits can't move a boundary; don't churn the heap per keystroke.
+        if roles and DueDateRole not in roles and Qt.CheckStateRole not in roles:
+            return
+        self.track(self.model.tasks[top_left.row():bottom_right.row() + 1])
+
+    def clear(self):
+        self.heap = []
+        self.current = {}
+        self.timer.stop()
+        self.armed_for = None
+
+    def track(self, tasks):
+        today = QDate.currentDate().toJulianDay()
+        push = self._push
+        for task in tasks:
+            if task["is_completed"]:
+                due = boundary = None
+            else:
+                due = task["due_date"].toJulianDay()
+                boundary = next_boundary(due, today)
+            push(task, RESTYLE, None if boundary is None else boundary * MINUTES_PER_DAY)
+            if self.reminders:
+                # Only tasks due today; later ones come back through here
+                # when their due day's midnight passes.
+                due_today = due == today and (id(task), today) not in self.reminded
+                push(task, REMIND, today * MINUTES_PER_DAY + REMINDER_MINUTE if due_today else None)
+        if len(self.heap) > 2 * len(self.current) + HEAP_SLACK:
+            self.heap = [entry for entry in self.heap if self.current.get(entry[3]) is entry]
+            heapq.heapify(self.heap)
+        self.arm()
+
+    def _push(self, task, kind, when):
+        key = (id(task), kind)
+        if when is None:
+            self.current.pop(key, None)
+            return
+        live = self.current.get(key)
+        if live is not None and live[0] == when:
+            return
+        # The task itself rides along so its id() stays unique while queued.
+        entry = (when, next(self.counter), task, key)
+        self.current[key] = entry
+        heapq.heappush(self.heap, entry)
+
+    def arm(self, now=None):
+        while self.heap and self.current.get(self.heap[0][3]) is not self.heap[0]:
+            heapq.heappop(self.heap)
+        if not self.heap:
+            self.timer.stop()
+            self.armed_for = None
+            return
+        when = self.heap[0][0]
+        if self.armed_for == when and self.timer.isActive():
+            return
+        self.armed_for = when
+        now = now or QDateTime.currentDateTime()
+        at = QDateTime(QDate.fromJulianDay(when // MINUTES_PER_DAY), QTime(0, 0).addSecs(when % MINUTES_PER_DAY * 60))
+        self.timer.start(max(0, min(now.msecsTo(at), MAX_WAIT_MS)))
+
+    def wake(self):
+        self.armed_for = None
+        now, stamp = _now()
+        crossed = []
+        remind = []
+        while self.heap and self.heap[0][0] <= stamp:
+            entry = heapq.heappop(self.heap)
+            when, _, task, key = entry
+            if self.current.get(key) is not entry:
+                continue
+            del self.current[key]
+            if key[1] == RESTYLE:
+                crossed.append(task)
+            else:
+                self.reminded.add((id(task), when // MINUTES_PER_DAY))
+                remind.append(task)
+        if crossed:
+            # Their dataChanged brings them back through track() with their
+            # next boundary.
+            self.model.tasks_changed(crossed)
+        if remind:
+            today = stamp // MINUTES_PER_DAY
+            self.reminded = {key for key in self.reminded if key[1] >= today}
+            self.reminders_due.emit(remind)
+        self.arm(now)
@@ -0,0 +1,119 @@
+from PySide6.QtCore import QObject, QTimer, Signal
+import db_async
+
+WRITE_BEHIND_IDLE_MS = 500
+
+
+class TaskWriteQueue(QObject):
+    """Coalesces task edits per task and writes them in one transaction once edits go idle.
+
+    write receives the batch as (task_id, text, due_date, is_completed,
+    client_ref) rows and returns whether it landed; local=True runs it on
+    db_async's local writer thread, for writes that go to a local file rather
+    than the server. A task not on the server yet has no task_id and is
+    keyed by its client_ref until assign_task_id() learns the id.
+
+    latest holds the newest values of edits not written yet, and written
+    is emitted with each {key: (text, due_date, is_completed)} batch that
+    landed.
+    """
+    written = Signal(object)
+
+    def __init__(self, write, local=False, idle_ms=WRITE_BEHIND_IDLE_MS, parent=None):
+        super().__init__(parent)
+        self.write = write
+        self.local = local
+        self.pending = {}
+        self.latest = {}
+        self.assigned = {}
+        self.failed = []
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(idle_ms)
+        self.timer.timeout.connect(self.flush_async)
+
+    def schedule(self, task_id, task_text, due_date, is_completed, client_ref=None):
+        key = client_ref if task_id is None else task_id
+        if key is None:
+            return
+        self.pending[key] = self.latest[key] = (task_text, due_date, is_completed)
+        self.timer.start()
+
+    def discard(self, task_id, client_ref=None):
+        for key in (task_id, client_ref):
+            self.pending.pop(key, None)
+            self.latest.pop(key, None)
+
+    def assign_task_id(self, client_ref, task_id):
+        # Later edits of the task come keyed by its task_id; move what is
+        # queued under the client_ref there so they coalesce.
+        self.assigned[client_ref] = task_id
+        for queue in (self.pending, self.latest):
+            if client_ref in queue:
+                queue.setdefault(task_id, queue.pop(client_ref))
+
+    def _take_batch(self):
+        self.timer.stop()
+        batch, self.pending = self.pending, {}
+        return batch, [(None, *values, key) if isinstance(key, str) else (key, *values, None)
+                       for key, values in batch.items()]
+
+    def _requeue(self, batch):
+        # Retry a failed batch, skipping tasks that were edited again (or
+        # deleted) since; their newer values are already queued or written.
+        for key, values in batch.items():
+            key = self.assigned.get(key, key)
+            if self.latest.get(key) == values:
+                self.pending.setdefault(key, values)
+        self.timer.start()
+
+    def _write(self, batch, rows):
+        # Runs on the writer thread; failures are parked until the GUI thread
+        # collects them so a blocking flush() can still pick them up on exit.
+        if not self.write(rows):
+            self.failed.append(batch)
+            return False
+        return True
+
+    def _collect_failed(self):
+        while self.failed:
+            self._requeue(self.failed.pop(0))
+
+    def _landed(self, batch):
+        # latest only has to outlive a batch that may still fail; edits made
+        # since it was taken stay.
+        for key, values in batch.items():
+            key = self.assigned.get(key, key)
+            if self.latest.get(key) == values:
+                del self.latest[key]
+
+    def _written(self, batch, ok):
+        self._collect_failed()
+        if ok:
+            self._landed(batch)
+            self.written.emit(batch)
+
+    def flush_async(self):
+        if not self.pending:
+            return
+        batch, rows = self._take_batch()
+        db_async.submit(self._write, batch, rows, serial=True, local=self.local).then(
+            lambda ok: self._written(batch, ok),
+            lambda error: self._requeue(batch)
+        )
+
+    def flush(self):
+        """Write everything now, blocking until earlier background flushes have landed."""
+        if self.local:
+            db_async.wait_for_local()
+        else:
+            db_async.wait_for_writes()
+        self._collect_failed()
+        if not self.pending:
+            return True
+        batch, rows = self._take_batch()
+        if self.write(rows):
+            self._landed(batch)
+            return True
+        self._requeue(batch)
+        return False